@@ -0,0 +1,231 @@
+"""In-process autocomplete over active product and category names.
+
+Every word start of a name becomes a key (so "pro" finds "iPhone 15 Pro"),
+truncated to KEY_LENGTH characters. The sorted key list is an implicit
+compressed trie: all keys under a prefix form one contiguous range found by
+binary search. Exact prefixes are a single range lookup; typo-tolerant lookups
+walk the trie with an edit-distance DP row per node (insertions, deletions,
+substitutions and transpositions), pruning every branch whose row minimum
+exceeds the allowed distance (1 typo for short queries, 2 for longer ones).
+
+The index is built on startup, updated from the product/category write
+routes and rebuilt every AUTOCOMPLETE_RELOAD_SECONDS so workers converge.
+Rebuilds sort all keys once in a worker thread and swap the new index in.
+"""
+import asyncio
+import logging
+import re
+from bisect import bisect_left, insort
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.config import AUTOCOMPLETE_MAX_KEYS, AUTOCOMPLETE_RELOAD_SECONDS
+from app.database import async_session_maker
+from app.models import Product as ProductModel, Category as CategoryModel
+
+logger = logging.getLogger("app.autocomplete")
+
+KEY_LENGTH = 24
+_MAX_CHAR = "\U0010ffff"
+_WORD_START = re.compile(r"(?:^|(?<=\W))\w", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _next_row(query: str, char: str, row: list[int], previous_row: Optional[list[int]], previous_char: str) -> list[int]:
+    """
+    Строка DP расстояния Дамерау-Левенштейна (optimal string alignment) после добавления char к префиксу узла
+    """
+    new_row = [row[0] + 1]
+    for i, query_char in enumerate(query, 1):
+        cost = query_char != char
+        value = min(row[i] + 1, new_row[i - 1] + 1, row[i - 1] + cost)
+        if previous_row is not None and i > 1 and query_char == previous_char and query[i - 2] == char:
+            value = min(value, previous_row[i - 2] + 1)
+        new_row.append(value)
+    return new_row
+
+
+class AutocompleteIndex:
+    """
+    Sorted word-start keys of product and category names
+    """
+
+    def __init__(self, max_keys: int = AUTOCOMPLETE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._keys: list[tuple[str, int]] = []
+        self._key_info: dict[int, tuple[str, tuple[str, int]]] = {}
+        self._target_keys: dict[tuple[str, int], list[int]] = {}
+        self._names: dict[tuple[str, int], str] = {}
+        self._next_key_id = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, kind: str, target_id: int, name: str) -> None:
+        """
+        Добавляет или обновляет имя товара/категории
+        """
+        self.remove(kind, target_id)
+        for key in self._register(kind, target_id, name):
+            insort(self._keys, key)
+
+    def _register(self, kind: str, target_id: int, name: str) -> list[tuple[str, int]]:
+        """
+        Заводит ключи имени в словарях; возвращает (key, key_id) для вставки в _keys
+        """
+        target = (kind, target_id)
+        normalized = normalize(name)
+        starts = [match.start() for match in _WORD_START.finditer(normalized)]
+        if len(self._key_info) + len(starts) > self.max_keys:
+            logger.warning("Autocomplete index is full (%s keys), %s %s not indexed", len(self._key_info), kind, target_id)
+            return []
+
+        self._names[target] = name
+        keys = []
+        for start in starts:
+            key = normalized[start:start + KEY_LENGTH]
+            key_id = self._next_key_id
+            self._next_key_id += 1
+            self._key_info[key_id] = (key, target)
+            keys.append((key, key_id))
+        self._target_keys[target] = [key_id for _, key_id in keys]
+        return keys
+
+    def remove(self, kind: str, target_id: int) -> None:
+        target = (kind, target_id)
+        for key_id in self._target_keys.pop(target, ()):
+            key, _ = self._key_info.pop(key_id)
+            del self._keys[bisect_left(self._keys, (key, key_id))]
+        self._names.pop(target, None)
+
+    def search(self, prefix: str, limit: int = 10) -> list[dict]:
+        """
+        Exact prefix matches first, then prefixes within the allowed edit distance
+        """
+        query = normalize(prefix)[:KEY_LENGTH]
+        if not query:
+            return []
+        found: dict[tuple[str, int], int] = {}
+
+        position = bisect_left(self._keys, (query, -1))
+        while position < len(self._keys) and len(found) < limit:
+            key, key_id = self._keys[position]
+            if not key.startswith(query):
+                break
+            found.setdefault(self._key_info[key_id][1], 0)
+            position += 1
+
+        if len(found) < limit and len(query) >= 3:
+            max_distance = 1 if len(query) < 7 else 2
+            fuzzy = self._fuzzy_search(query, max_distance, limit * 4)
+            ranked = sorted(
+                ((target, distance) for target, distance in fuzzy.items() if target not in found),
+                key=lambda item: (item[1], len(self._names[item[0]]), item[0]),
+            )
+            for target, distance in ranked[:limit - len(found)]:
+                found[target] = distance
+
+        return [
+            {"kind": kind, "id": target_id, "name": self._names[(kind, target_id)], "distance": distance}
+            for (kind, target_id), distance in found.items()
+        ]
+
+    def _fuzzy_search(self, query: str, max_distance: int, max_results: int) -> dict[tuple[str, int], int]:
+        """
+        Trie walk over the sorted keys: a node is the key range sharing a prefix.
+
+        The distance of a key is the minimum of row[-1] over its prefixes, so a
+        matched node is still descended while a deeper prefix can match better.
+        """
+        keys = self._keys
+        # Диапазоны ключей с их расстоянием; заполняются обходом, разбираются от лучших к худшим
+        matches: list[tuple[int, int, int]] = []
+
+        # Первая буква считается верной (как prefix_length=1 в поисковых движках):
+        # это в разы сужает обход, а опечатки в первой букве редки
+        lo = bisect_left(keys, (query[0],))
+        hi = bisect_left(keys, (query[0] + _MAX_CHAR,), lo)
+        root_row = list(range(len(query) + 1))
+        first_row = _next_row(query, query[0], root_row, None, "")
+        # (диапазон узла, глубина, строка DP узла, строка родителя, последний символ, лучшее расстояние на пути)
+        stack = [(lo, hi, 1, first_row, root_row, query[0], first_row[-1])]
+        while stack:
+            lo, hi, depth, row, previous_row, previous_char, best = stack.pop()
+            position = lo
+            # Ключи, равные префиксу узла, стоят в начале диапазона и потомков не имеют
+            while position < hi and len(keys[position][0]) <= depth:
+                position += 1
+            if best <= max_distance and position > lo:
+                matches.append((best, lo, position))
+            while position < hi:
+                child_prefix = keys[position][0][:depth + 1]
+                child_end = bisect_left(keys, (child_prefix + _MAX_CHAR,), position, hi)
+                child_row = _next_row(query, child_prefix[-1], row, previous_row, previous_char)
+                child_best = min(best, child_row[-1])
+                if min(child_row) < min(child_best, max_distance + 1) and depth + 1 < len(query) + max_distance:
+                    # Глубже расстояние еще может уменьшиться
+                    stack.append((position, child_end, depth + 1, child_row, row, child_prefix[-1], child_best))
+                elif child_best <= max_distance:
+                    # Весь запрос совпал с префиксом узла и лучше не станет - подходят все ключи поддерева
+                    matches.append((child_best, position, child_end))
+                position = child_end
+
+        results: dict[tuple[str, int], int] = {}
+        for distance, start, end in sorted(matches):
+            for _, key_id in keys[start:end]:
+                results.setdefault(self._key_info[key_id][1], distance)
+                if len(results) >= max_results:
+                    return results
+        return results
+
+    @classmethod
+    def build(cls, products, categories, max_keys: int = AUTOCOMPLETE_MAX_KEYS) -> "AutocompleteIndex":
+        """
+        Новый индекс: ключи собираются списком и сортируются один раз (insort на каждый ключ квадратичен)
+        """
+        index = cls(max_keys)
+        keys = []
+        for target_id, name in categories:
+            keys.extend(index._register("category", target_id, name))
+        for target_id, name in products:
+            keys.extend(index._register("product", target_id, name))
+        keys.sort()
+        index._keys = keys
+        return index
+
+    def replace(self, other: "AutocompleteIndex") -> None:
+        """
+        Заменяет содержимое готовым индексом (одно присваивание, без await)
+        """
+        self.__dict__.update(other.__dict__)
+
+    def load(self, products, categories) -> None:
+        self.replace(self.build(products, categories, self.max_keys))
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+async def load_autocomplete() -> None:
+    """
+    Build this worker's index from active products and categories
+    """
+    async with async_session_maker() as db:
+        products = (await db.execute(select(ProductModel.id, ProductModel.name).where(ProductModel.is_active == True))).all()
+        categories = (await db.execute(select(CategoryModel.id, CategoryModel.name).where(CategoryModel.is_active == True))).all()
+    # Сборка идет в отдельном потоке, чтобы не останавливать event loop на время сортировки
+    fresh = await asyncio.to_thread(AutocompleteIndex.build, products, categories, autocomplete_index.max_keys)
+    autocomplete_index.replace(fresh)
+
+
+async def reload_autocomplete_periodically() -> None:
+    while True:
+        await asyncio.sleep(AUTOCOMPLETE_RELOAD_SECONDS)
+        try:
+            await load_autocomplete()
+        except Exception:
+            logger.exception("Failed to reload autocomplete index")
@@ -0,0 +1,165 @@
+"""Benchmark of cascading category deactivation on deep and wide trees.
+
+Usage (local PostgreSQL from DATABASE_URL, migrated to head):
+
+    python -m app.benchmarks.category_cascade --depth 8 --fanout 4 --products 20
+
+For every tree shape the script inserts a category tree with N products per
+category, deactivates it once with the recursive CTE (deactivate_category_subtree)
+and once the old way - one SELECT, UPDATE and commit per row - then reactivates
+it and deletes the generated rows.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import select, update, delete, insert, func
+
+from app.database import async_engine, async_session_maker
+from app.models import Category as CategoryModel, Product as ProductModel, User as UserModel
+from app.routers.utils import deactivate_category_subtree, reactivate_category_subtree
+
+NAME_PREFIX = "cascade-bench"
+
+
+async def build_tree(depth: int, fanout: int, products: int, seller_id: int) -> tuple[int, list[int]]:
+    """
+    Строит дерево уровень за уровнем (один INSERT на уровень); возвращает корень и все id категорий
+    """
+    async with async_session_maker() as db:
+        root_id = await db.scalar(
+            insert(CategoryModel).values(name=f"{NAME_PREFIX} root", is_active=True).returning(CategoryModel.id)
+        )
+        level, category_ids = [root_id], [root_id]
+        for _ in range(depth - 1):
+            result = await db.execute(
+                insert(CategoryModel).returning(CategoryModel.id),
+                [
+                    {"name": f"{NAME_PREFIX} {parent_id}.{n}", "is_active": True, "parent_id": parent_id}
+                    for parent_id in level for n in range(fanout)
+                ],
+            )
+            level = result.scalars().all()
+            category_ids.extend(level)
+        if products:
+            await db.execute(
+                insert(ProductModel),
+                [
+                    {
+                        "name": f"{NAME_PREFIX} product {category_id}.{n}",
+                        "price": 1,
+                        "stock": 1,
+                        "is_active": True,
+                        "category_id": category_id,
+                        "seller_id": seller_id,
+                    }
+                    for category_id in category_ids for n in range(products)
+                ],
+            )
+        await db.commit()
+    return root_id, category_ids
+
+
+async def deactivate_per_row(category_ids: list[int]) -> None:
+    """
+    Старый способ: каждая категория и каждый товар - отдельный SELECT, UPDATE и commit
+    """
+    async with async_session_maker() as db:
+        for category_id in category_ids:
+            category = await db.scalar(select(CategoryModel).where(CategoryModel.id == category_id))
+            await db.execute(update(CategoryModel).where(CategoryModel.id == category.id).values(is_active=False))
+            await db.commit()
+            product_ids = (await db.scalars(
+                select(ProductModel.id).where(ProductModel.category_id == category_id, ProductModel.is_active == True)
+            )).all()
+            for product_id in product_ids:
+                product = await db.scalar(select(ProductModel).where(ProductModel.id == product_id))
+                await db.execute(update(ProductModel).where(ProductModel.id == product.id).values(is_active=False))
+                await db.commit()
+
+
+async def reset(category_ids: list[int]) -> None:
+    async with async_session_maker() as db:
+        await db.execute(
+            update(CategoryModel).where(CategoryModel.id.in_(category_ids)).values(is_active=True, deactivated_by_id=None)
+        )
+        await db.execute(
+            update(ProductModel).where(ProductModel.category_id.in_(category_ids)).values(is_active=True, deactivated_by_id=None)
+        )
+        await db.commit()
+
+
+async def cleanup(category_ids: list[int]) -> None:
+    async with async_session_maker() as db:
+        await db.execute(delete(ProductModel).where(ProductModel.category_id.in_(category_ids)))
+        # Сначала листья: parent_id ссылается на categories.id
+        for category_id in reversed(category_ids):
+            await db.execute(delete(CategoryModel).where(CategoryModel.id == category_id))
+        await db.commit()
+
+
+async def run_shape(depth: int, fanout: int, products: int, seller_id: int) -> None:
+    root_id, category_ids = await build_tree(depth, fanout, products, seller_id)
+    try:
+        started = time.perf_counter()
+        async with async_session_maker() as db:
+            deactivated, deactivated_products = await deactivate_category_subtree(root_id, db)
+            await db.commit()
+        cascade = time.perf_counter() - started
+
+        started = time.perf_counter()
+        async with async_session_maker() as db:
+            reactivated, reactivated_products = await reactivate_category_subtree(root_id, db)
+            await db.commit()
+        reactivate = time.perf_counter() - started
+        assert len(deactivated) == len(reactivated) == len(category_ids)
+        assert len(deactivated_products) == len(reactivated_products) == len(category_ids) * products
+
+        await reset(category_ids)
+        started = time.perf_counter()
+        await deactivate_per_row(category_ids)
+        per_row = time.perf_counter() - started
+
+        print(
+            f"depth={depth:<3} fanout={fanout:<3} categories={len(category_ids):<7} "
+            f"products={len(deactivated_products):<8} cte={cascade * 1000:8.1f}ms "
+            f"reactivate={reactivate * 1000:8.1f}ms per-row={per_row * 1000:10.1f}ms "
+            f"speedup={per_row / cascade:6.1f}x"
+        )
+    finally:
+        await cleanup(category_ids)
+
+
+async def run(shapes: list[tuple[int, int]], products: int) -> None:
+    async with async_session_maker() as db:
+        seller_id = await db.scalar(select(func.min(UserModel.id)))
+    if seller_id is None:
+        raise SystemExit("The database needs at least one user to own the generated products")
+    for depth, fanout in shapes:
+        await run_shape(depth, fanout, products, seller_id)
+    await async_engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=None, help="Benchmark a single shape instead of the default set")
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--products", type=int, default=10, help="Products per category")
+    args = parser.parse_args()
+
+    if async_engine.url.host not in ("localhost", "127.0.0.1"):
+        print(f"Refusing to write benchmark data to non-local database {async_engine.url.host}")
+        return 2
+
+    if args.depth is not None:
+        shapes = [(args.depth, args.fanout)]
+    else:
+        # Глубокая цепочка, широкий куст и сбалансированное дерево
+        shapes = [(200, 1), (2, 2000), (6, 4), (8, 4)]
+    asyncio.run(run(shapes, args.products))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
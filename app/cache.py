@@ -0,0 +1,150 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.config import (
+    PRODUCT_CACHE_TTL,
+    PRODUCT_CACHE_STALE_TTL,
+    PRODUCT_CACHE_JITTER,
+    PRODUCT_CACHE_MAX_BYTES,
+    PRODUCT_DETAIL_CACHE_TTL,
+)
+
+
+class TTLCache:
+    """
+    Small in-process cache with per-entry expiry and LRU eviction
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+
+class ReadThroughCache:
+    """
+    Read-through cache of serialized values with single-flight loading.
+
+    Concurrent misses for one key share a single loader call. Entries are
+    fresh for ttl (with random jitter so hot keys do not expire together),
+    then served stale for up to stale_ttl while one background refresh runs.
+    Total size of cached bytes is bounded with LRU eviction.
+    A loader result of None (not found) is returned but never stored.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, jitter: float = 0.1, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.jitter = jitter
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[float, float, bytes]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "errors": 0}
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            if now < fresh_until:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if now < stale_until:
+                self.stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                self._load(key, loader)
+                return value
+
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+        # shield: отмена одного ожидающего запроса не отменяет общую загрузку
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[bytes]]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            # ошибка фонового обновления не должна теряться как "never retrieved"
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _run_loader(self, key: Hashable, loader: Callable[[], Awaitable[Optional[bytes]]]) -> Optional[bytes]:
+        current = asyncio.current_task()
+        try:
+            value = await loader()
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            if self._inflight.get(key) is current:
+                del self._inflight[key]
+            else:
+                # ключ инвалидирован во время загрузки - результат мог устареть, не сохраняем
+                current = None
+        if current is not None:
+            if value is None:
+                # "не найдено" не кэшируется: объект может появиться в любой момент
+                self._drop(key)
+            else:
+                self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: bytes) -> None:
+        self._drop(key)
+        ttl = self.ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, now + ttl + self.stale_ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes and self._entries:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._inflight.pop(key, None)
+        self._drop(key)
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[2])
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "entries": len(self._entries), "bytes": self.size, "inflight": len(self._inflight)}
+
+
+product_cache = ReadThroughCache(
+    ttl=PRODUCT_CACHE_TTL, stale_ttl=PRODUCT_CACHE_STALE_TTL, jitter=PRODUCT_CACHE_JITTER, max_bytes=PRODUCT_CACHE_MAX_BYTES,
+)
+product_reviews_cache = ReadThroughCache(
+    ttl=PRODUCT_CACHE_TTL, stale_ttl=PRODUCT_CACHE_STALE_TTL, jitter=PRODUCT_CACHE_JITTER, max_bytes=PRODUCT_CACHE_MAX_BYTES,
+)
+product_detail_cache = TTLCache(ttl=PRODUCT_DETAIL_CACHE_TTL)
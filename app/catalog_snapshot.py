@@ -0,0 +1,244 @@
+"""Memory-mapped columnar snapshot of the active catalog.
+
+The builder exports active products into one file: fixed-width NumPy columns
+(id, category_id, seller_id, price, stock, rating) plus a UTF-8 string heap
+for name/description/image_url. Every worker memory-maps the file and answers
+GET /products/ and GET /products/category/{id}, including the price filter and
+sorting, with vectorised operations; a new file is written next to the old
+one and renamed over it, so readers switch atomically. A snapshot older than
+CATALOG_SNAPSHOT_MAX_AGE is ignored and the routes fall back to PostgreSQL.
+
+    python -m app.catalog_snapshot            # build once
+    python -m app.catalog_snapshot --loop     # rebuild every CATALOG_SNAPSHOT_BUILD_INTERVAL
+"""
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import (
+    CATALOG_SNAPSHOT_PATH,
+    CATALOG_SNAPSHOT_MAX_AGE,
+    CATALOG_SNAPSHOT_CHECK_INTERVAL,
+    CATALOG_SNAPSHOT_BUILD_INTERVAL,
+)
+from app.database import async_session_maker
+from app.models import Product as ProductModel, Category as CategoryModel
+
+MAGIC = b"CATSNAP1"
+ALIGN = 64
+NUMERIC_COLUMNS = (
+    ("id", np.int64),
+    ("category_id", np.int64),
+    ("seller_id", np.int64),
+    ("price", np.float64),
+    ("stock", np.int64),
+    ("rating", np.float64),
+)
+STRING_FIELDS = ("name", "description", "image_url")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_snapshot(path: str, columns: dict[str, np.ndarray], strings: list[Optional[str]], category_ids: np.ndarray) -> None:
+    """
+    Записывает снимок во временный файл и атомарно подменяет им старый
+    """
+    encoded = [value.encode() if value is not None else b"" for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    arrays = {
+        **{name: np.ascontiguousarray(columns[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS},
+        "str_offsets": offsets,
+        "str_null": np.array([value is None for value in strings], dtype=np.uint8),
+        "category_ids": np.ascontiguousarray(category_ids, dtype=np.int64),
+        "heap": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "count": int(array.size), "offset": position}
+        position = _align(position + array.nbytes)
+    header = json.dumps({"built_at": time.time(), "rows": int(arrays["id"].size), "columns": layout}).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CatalogSnapshot:
+    """
+    Read-only view over a memory-mapped snapshot file
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.stat = os.fstat(f.fileno())
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + header_len])
+        data_start = _align(len(MAGIC) + 8 + header_len)
+        self.built_at: float = header["built_at"]
+        self.columns = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=data_start + spec["offset"])
+            for name, spec in header["columns"].items()
+        }
+        self._category_ids = self.columns["category_ids"]
+        self._heap_offset = data_start + header["columns"]["heap"]["offset"]
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.built_at > CATALOG_SNAPSHOT_MAX_AGE
+
+    def has_category(self, category_id: int) -> bool:
+        position = np.searchsorted(self._category_ids, category_id)
+        return position < self._category_ids.size and self._category_ids[position] == category_id
+
+    def _strings(self, rows: np.ndarray) -> list[Optional[str]]:
+        """
+        Строки name/description/image_url выбранных строк подряд
+        """
+        indexes = (rows[:, None] * len(STRING_FIELDS) + np.arange(len(STRING_FIELDS))).ravel()
+        # Срезы mmap копируют только байты самой строки, куча целиком в память воркера не читается
+        offsets = self.columns["str_offsets"]
+        starts = (offsets[indexes] + self._heap_offset).tolist()
+        ends = (offsets[indexes + 1] + self._heap_offset).tolist()
+        heap = self._mmap
+        return [
+            None if is_null else heap[start:end].decode()
+            for start, end, is_null in zip(starts, ends, self.columns["str_null"][indexes].tolist())
+        ]
+
+    def list_products(self, category_id: Optional[int] = None, sort_by: str = "id", descending: bool = False,
+                      min_price: Optional[float] = None, max_price: Optional[float] = None) -> list[dict]:
+        """
+        Active products, optionally of one category and price range, sorted by sort_by (ties by id).
+        Products without rating go last in both directions, as NULLS LAST in PostgreSQL.
+        """
+        columns = self.columns
+        mask = np.ones(columns["id"].size, dtype=bool)
+        if category_id is not None:
+            mask &= columns["category_id"] == category_id
+        if min_price is not None:
+            mask &= columns["price"] >= min_price
+        if max_price is not None:
+            mask &= columns["price"] <= max_price
+        rows = np.flatnonzero(mask)
+        if sort_by != "id":
+            key = columns[sort_by][rows].astype(np.float64)
+            # lexsort ставит NaN в конец; id в файле уже по возрастанию
+            rows = rows[np.lexsort((rows, -key if descending else key))]
+        elif descending:
+            rows = rows[::-1]
+
+        ratings = columns["rating"][rows]
+        ratings = np.where(np.isnan(ratings), None, ratings).tolist()
+        strings = self._strings(rows)
+        return [
+            {
+                "id": product_id,
+                "name": name,
+                "description": description,
+                "price": price,
+                "image_url": image_url,
+                "stock": stock,
+                "rating": rating,
+                "category_id": product_category_id,
+                "is_active": True,
+            }
+            for product_id, name, description, price, image_url, stock, rating, product_category_id in zip(
+                columns["id"][rows].tolist(), strings[0::3], strings[1::3], columns["price"][rows].tolist(),
+                strings[2::3], columns["stock"][rows].tolist(), ratings, columns["category_id"][rows].tolist(),
+            )
+        ]
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_checked_at = 0.0
+
+
+def get_snapshot() -> Optional[CatalogSnapshot]:
+    """
+    Current snapshot of this worker, or None if it is missing or stale.
+    The file is re-checked at most every CATALOG_SNAPSHOT_CHECK_INTERVAL seconds.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= CATALOG_SNAPSHOT_CHECK_INTERVAL:
+        _checked_at = now
+        try:
+            stat = os.stat(CATALOG_SNAPSHOT_PATH)
+            if _snapshot is None or (stat.st_ino, stat.st_mtime_ns) != (_snapshot.stat.st_ino, _snapshot.stat.st_mtime_ns):
+                _snapshot = CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+        except (OSError, ValueError):
+            _snapshot = None
+    if _snapshot is None or _snapshot.is_stale:
+        return None
+    return _snapshot
+
+
+async def build_snapshot(path: str = CATALOG_SNAPSHOT_PATH) -> int:
+    """
+    Export active products into a new snapshot; returns the number of rows
+    """
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(
+                ProductModel.id, ProductModel.category_id, ProductModel.seller_id, ProductModel.price,
+                ProductModel.stock, ProductModel.rating, ProductModel.name, ProductModel.description,
+                ProductModel.image_url,
+            )
+            .where(ProductModel.is_active == True)
+            .order_by(ProductModel.id)
+        )
+        rows = result.all()
+        category_ids = (await db.scalars(select(CategoryModel.id).order_by(CategoryModel.id))).all()
+
+    columns = {
+        "id": [row.id for row in rows],
+        "category_id": [row.category_id for row in rows],
+        "seller_id": [row.seller_id for row in rows],
+        "price": [row.price for row in rows],
+        "stock": [row.stock for row in rows],
+        "rating": [float(row.rating) if row.rating is not None else np.nan for row in rows],
+    }
+    strings = [value for row in rows for value in (row.name, row.description, row.image_url)]
+    write_snapshot(path, columns, strings, np.array(category_ids, dtype=np.int64))
+    return len(rows)
+
+
+async def _build_loop() -> None:
+    while True:
+        started = time.perf_counter()
+        rows = await build_snapshot()
+        print(f"Catalog snapshot: {rows} products in {time.perf_counter() - started:.2f}s")
+        await asyncio.sleep(CATALOG_SNAPSHOT_BUILD_INTERVAL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the catalog snapshot")
+    parser.add_argument("--loop", action="store_true", help="Rebuild periodically")
+    args = parser.parse_args()
+    if args.loop:
+        asyncio.run(_build_loop())
+    else:
+        print(f"Catalog snapshot: {asyncio.run(build_snapshot())} products")
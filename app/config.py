@@ -3,4 +3,66 @@ from dotenv import load_dotenv
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
\ No newline at end of file
+ALGORITHM = "HS256"
+
+# --------------- Профилирование запросов -------------------------
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "50"))
+PROFILE_ADMIN_CACHE_TTL = float(os.getenv("PROFILE_ADMIN_CACHE_TTL", "60"))
+
+# --------------- Логирование медленных запросов -------------------------
+
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "1000"))
+
+# --------------- Live-обновления товаров -------------------------
+
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+LIVE_MAX_SUBSCRIPTIONS = int(os.getenv("LIVE_MAX_SUBSCRIPTIONS", "200"))
+LIVE_KEEPALIVE_SECONDS = int(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+
+# --------------- Карточка товара -------------------------
+
+PRODUCT_DETAIL_CACHE_TTL = float(os.getenv("PRODUCT_DETAIL_CACHE_TTL", "5"))
+PRODUCT_DETAIL_REVIEWS = int(os.getenv("PRODUCT_DETAIL_REVIEWS", "10"))
+
+# --------------- Похожие товары -------------------------
+
+RELATED_PRODUCTS_TOP_K = int(os.getenv("RELATED_PRODUCTS_TOP_K", "20"))
+RELATED_PRODUCTS_MAX_USER_REVIEWS = int(os.getenv("RELATED_PRODUCTS_MAX_USER_REVIEWS", "200"))
+RELATED_PRODUCTS_SHRINKAGE = float(os.getenv("RELATED_PRODUCTS_SHRINKAGE", "10"))
+
+# --------------- Таймауты запросов к БД -------------------------
+
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
+# --------------- Кэш горячих товаров -------------------------
+
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "5"))
+PRODUCT_CACHE_STALE_TTL = float(os.getenv("PRODUCT_CACHE_STALE_TTL", "30"))
+PRODUCT_CACHE_JITTER = float(os.getenv("PRODUCT_CACHE_JITTER", "0.1"))
+PRODUCT_CACHE_MAX_BYTES = int(os.getenv("PRODUCT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# --------------- Снимок каталога -------------------------
+
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "catalog.snapshot")
+CATALOG_SNAPSHOT_MAX_AGE = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "120"))
+CATALOG_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_CHECK_INTERVAL", "1"))
+CATALOG_SNAPSHOT_BUILD_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_BUILD_INTERVAL", "30"))
+
+# --------------- Лидерборды категорий -------------------------
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "50"))
+LEADERBOARD_TREND_HALF_LIFE_HOURS = float(os.getenv("LEADERBOARD_TREND_HALF_LIFE_HOURS", "72"))
+LEADERBOARD_PRIOR_MEAN = float(os.getenv("LEADERBOARD_PRIOR_MEAN", "3"))
+LEADERBOARD_PRIOR_WEIGHT = float(os.getenv("LEADERBOARD_PRIOR_WEIGHT", "5"))
+LEADERBOARD_RELOAD_SECONDS = float(os.getenv("LEADERBOARD_RELOAD_SECONDS", "300"))
+
+# --------------- Автодополнение -------------------------
+
+AUTOCOMPLETE_MAX_KEYS = int(os.getenv("AUTOCOMPLETE_MAX_KEYS", "2000000"))
+AUTOCOMPLETE_RELOAD_SECONDS = float(os.getenv("AUTOCOMPLETE_RELOAD_SECONDS", "600"))
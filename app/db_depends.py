@@ -16,13 +16,15 @@ def get_db() -> Session:
 # --------------- Асинхронная сессия -------------------------
 
 from typing import AsyncGenerator
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import async_session_maker
+from app.timeouts import route_statement_timeout
 
-async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
-    Async session with psql
+    Async session with psql, statement_timeout from the route budget
     """
     async with async_session_maker() as session:
+        session.info["statement_timeout_ms"] = route_statement_timeout(request)
         yield session
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""Per-category "top rated" and "trending" leaderboards.
+
+product_scores keeps one compact row per reviewed product: grade sum, review
+count and a time-decayed trending score. The trending score is stored in log
+space relative to a fixed epoch, log(sum(exp((t_review - epoch) / tau))), so
+scores of all products decay at the same rate and their order never changes
+with time - only new or deleted reviews touch it, and both are O(1) updates.
+
+Writes update product_scores atomically in SQL and then the in-memory
+leaderboards of this worker; every worker also reloads the table on startup
+and every LEADERBOARD_RELOAD_SECONDS.
+
+    python -m app.leaderboards --rebuild    # recompute product_scores from reviews
+"""
+import argparse
+import asyncio
+import heapq
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Select, select, update, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    LEADERBOARD_SIZE,
+    LEADERBOARD_TREND_HALF_LIFE_HOURS,
+    LEADERBOARD_PRIOR_MEAN,
+    LEADERBOARD_PRIOR_WEIGHT,
+    LEADERBOARD_RELOAD_SECONDS,
+)
+from app.database import async_session_maker
+from app.models import ProductScore as ProductScoreModel
+
+logger = logging.getLogger("app.leaderboards")
+
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+TREND_TAU = LEADERBOARD_TREND_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def trend_exponent(comment_date: datetime) -> float:
+    """
+    (t - epoch) / tau; naive даты считаются UTC, как extract(epoch) в PostgreSQL
+    """
+    if comment_date.tzinfo is None:
+        comment_date = comment_date.replace(tzinfo=timezone.utc)
+    return (comment_date.timestamp() - TREND_EPOCH) / TREND_TAU
+
+
+def rating_score(grade_sum: int, review_count: int) -> float:
+    """
+    Байесовское среднее: один отзыв на 5 не обгоняет сотню отзывов со средним 4.8
+    """
+    return (LEADERBOARD_PRIOR_MEAN * LEADERBOARD_PRIOR_WEIGHT + grade_sum) / (LEADERBOARD_PRIOR_WEIGHT + review_count)
+
+
+class Leaderboard:
+    """
+    Scores of one category with a cached top-N.
+
+    Raising a score or adding a product updates the cached top in O(N);
+    lowering or removing a member of the top only drops the cache, which is
+    rebuilt on the next read.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        self.scores: dict[int, float] = {}
+        self._top: Optional[list[tuple[float, int]]] = None
+
+    def set(self, product_id: int, score: float) -> None:
+        old = self.scores.get(product_id)
+        self.scores[product_id] = score
+        if self._top is None:
+            return
+        in_top = old is not None and (old, product_id) in self._top
+        if in_top and score < old:
+            self._top = None
+            return
+        if in_top:
+            self._top.remove((old, product_id))
+        if in_top or len(self._top) < self.size or (score, product_id) > self._top[-1]:
+            self._top.append((score, product_id))
+            self._top.sort(reverse=True)
+            del self._top[self.size:]
+
+    def remove(self, product_id: int) -> None:
+        old = self.scores.pop(product_id, None)
+        if old is not None and self._top is not None and (old, product_id) in self._top:
+            self._top = None
+
+    def top(self, limit: int) -> list[tuple[float, int]]:
+        if self._top is None:
+            self._top = heapq.nlargest(self.size, ((score, product_id) for product_id, score in self.scores.items()))
+        return self._top[:limit]
+
+
+class CategoryLeaderboards:
+    """
+    Top rated and trending leaderboards of all categories in this worker
+    """
+
+    def __init__(self):
+        self.top_rated: dict[int, Leaderboard] = {}
+        self.trending: dict[int, Leaderboard] = {}
+        self.products: dict[int, dict] = {}
+
+    def load(self, rows) -> None:
+        """
+        Заменяет все лидерборды построенными заново из строк product_scores
+        """
+        fresh = CategoryLeaderboards()
+        for row in rows:
+            fresh.apply(row)
+        self.top_rated, self.trending, self.products = fresh.top_rated, fresh.trending, fresh.products
+
+    def apply(self, row) -> None:
+        """
+        Применяет актуальную строку product_scores
+        """
+        old = self.products.get(row.product_id)
+        if old is not None:
+            self.top_rated[old["category_id"]].remove(row.product_id)
+            self.trending[old["category_id"]].remove(row.product_id)
+        self.products[row.product_id] = {
+            "category_id": row.category_id,
+            "grade_sum": row.grade_sum,
+            "review_count": row.review_count,
+        }
+        top_rated = self.top_rated.setdefault(row.category_id, Leaderboard())
+        trending = self.trending.setdefault(row.category_id, Leaderboard())
+        if row.is_active and row.review_count > 0:
+            top_rated.set(row.product_id, rating_score(row.grade_sum, row.review_count))
+        if row.is_active and row.trend_score is not None:
+            trending.set(row.product_id, row.trend_score)
+
+    def get_top_rated(self, category_id: int, limit: int) -> list[dict]:
+        board = self.top_rated.get(category_id)
+        if board is None:
+            return []
+        return [
+            {
+                "product_id": product_id,
+                "score": round(score, 4),
+                "review_count": self.products[product_id]["review_count"],
+            }
+            for score, product_id in board.top(limit)
+        ]
+
+    def get_trending(self, category_id: int, limit: int) -> list[dict]:
+        board = self.trending.get(category_id)
+        if board is None:
+            return []
+        # Текущее значение затухшей суммы: exp(log_score - (now - epoch) / tau)
+        now_exponent = (time.time() - TREND_EPOCH) / TREND_TAU
+        return [
+            {
+                "product_id": product_id,
+                "score": round(math.exp(score - now_exponent), 4),
+                "review_count": self.products[product_id]["review_count"],
+            }
+            for score, product_id in board.top(limit)
+        ]
+
+
+leaderboards = CategoryLeaderboards()
+
+
+async def load_leaderboards() -> None:
+    """
+    Rebuild this worker's leaderboards from product_scores
+    """
+    async with async_session_maker() as db:
+        rows = (await db.execute(select(ProductScoreModel))).scalars().all()
+    leaderboards.load(rows)
+
+
+async def reload_leaderboards_periodically() -> None:
+    while True:
+        await asyncio.sleep(LEADERBOARD_RELOAD_SECONDS)
+        try:
+            await load_leaderboards()
+        except Exception:
+            logger.exception("Failed to reload leaderboards")
+
+
+async def record_review(db: AsyncSession, product_id: int, category_id: int, grade: int,
+                        comment_date: datetime, added: bool) -> None:
+    """
+    Adds or removes one review in product_scores (atomic SQL arithmetic) and in memory
+    """
+    exponent = trend_exponent(comment_date)
+    table = ProductScoreModel.__table__
+    if added:
+        stmt = insert(ProductScoreModel).values(
+            product_id=product_id,
+            category_id=category_id,
+            grade_sum=grade,
+            review_count=1,
+            trend_score=exponent,
+            is_active=True,
+        )
+        # log(exp(a) + exp(b)) = max(a, b) + ln(1 + exp(-|a - b|))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.product_id],
+            set_={
+                "grade_sum": table.c.grade_sum + grade,
+                "review_count": table.c.review_count + 1,
+                "trend_score": text(
+                    "CASE WHEN product_scores.trend_score IS NULL THEN excluded.trend_score "
+                    "ELSE greatest(product_scores.trend_score, excluded.trend_score) "
+                    "+ ln(1 + exp(-abs(product_scores.trend_score - excluded.trend_score))) END"
+                ),
+            },
+        ).returning(ProductScoreModel)
+    else:
+        # log(exp(a) - exp(b)) = a + ln(1 - exp(b - a)); последний отзыв обнуляет счет
+        stmt = (
+            update(ProductScoreModel)
+            .where(ProductScoreModel.product_id == product_id)
+            .values(
+                grade_sum=ProductScoreModel.grade_sum - grade,
+                review_count=ProductScoreModel.review_count - 1,
+                trend_score=text(
+                    "CASE WHEN review_count <= 1 OR trend_score - :exponent < 1e-9 THEN NULL "
+                    "ELSE trend_score + ln(1 - exp(:exponent - trend_score)) END"
+                ).bindparams(exponent=exponent),
+            )
+            .returning(ProductScoreModel)
+        )
+    row = (await db.execute(stmt)).scalars().first()
+    await db.commit()
+    if row is not None:
+        leaderboards.apply(row)
+
+
+async def record_product(db: AsyncSession, product_id: int, category_id: int, is_active: bool) -> None:
+    """
+    Moves a product between categories or hides/shows it on the leaderboards
+    """
+    row = (await db.execute(
+        update(ProductScoreModel)
+        .where(ProductScoreModel.product_id == product_id)
+        .values(category_id=category_id, is_active=is_active)
+        .returning(ProductScoreModel)
+    )).scalars().first()
+    await db.commit()
+    if row is not None:
+        leaderboards.apply(row)
+
+
+async def set_products_active(db: AsyncSession, product_ids: Select, is_active: bool) -> list:
+    """
+    Set-based is_active update for the products of a SELECT of ids (category cascade), without commit.
+    Apply the returned rows with leaderboards.apply() after the caller commits.
+    """
+    result = await db.execute(
+        update(ProductScoreModel)
+        .where(ProductScoreModel.product_id.in_(product_ids))
+        .values(is_active=is_active)
+        .returning(ProductScoreModel)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalars().all()
+
+
+REBUILD_SQL = """
+INSERT INTO product_scores (product_id, category_id, grade_sum, review_count, trend_score, is_active)
+SELECT r.product_id, p.category_id, sum(r.grade), count(*), max(r.max_x) + ln(sum(exp(r.x - r.max_x))), p.is_active
+FROM (
+    SELECT product_id, grade, x, max(x) OVER (PARTITION BY product_id) AS max_x
+    FROM (
+        SELECT product_id, grade, (extract(epoch FROM comment_date) - :epoch) / :tau AS x
+        FROM reviews WHERE is_active
+    ) AS s
+) AS r
+JOIN products p ON p.id = r.product_id
+GROUP BY r.product_id, p.category_id, p.is_active
+ON CONFLICT (product_id) DO UPDATE SET
+    category_id = excluded.category_id,
+    grade_sum = excluded.grade_sum,
+    review_count = excluded.review_count,
+    trend_score = excluded.trend_score,
+    is_active = excluded.is_active
+"""
+
+
+async def rebuild_product_scores() -> None:
+    """
+    Recompute product_scores from reviews (initial fill or repair)
+    """
+    async with async_session_maker() as db:
+        await db.execute(text("DELETE FROM product_scores"))
+        await db.execute(text(REBUILD_SQL), {"epoch": TREND_EPOCH, "tau": TREND_TAU})
+        await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute product_scores from reviews")
+    args = parser.parse_args()
+    if args.rebuild:
+        asyncio.run(rebuild_product_scores())
+        print("product_scores rebuilt")
@@ -0,0 +1,142 @@
+"""Live product deltas for WebSocket/SSE subscribers.
+
+Subscribers live in the memory of the worker that accepted their connection,
+so publishing goes through PostgreSQL LISTEN/NOTIFY: publish_product() sends
+a NOTIFY on LIVE_CHANNEL and every worker (the publishing one included) fans
+the delta out to its own subscribers from a dedicated listening connection.
+"""
+import asyncio
+import json
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+
+from app.config import LIVE_QUEUE_SIZE
+from app.database import async_engine
+
+logger = logging.getLogger("app.live")
+
+LIVE_CHANNEL = "live_products"
+LISTEN_RETRY_SECONDS = 1
+
+
+class Subscriber:
+    """
+    One WebSocket/SSE connection with a bounded send queue
+    """
+
+    def __init__(self, queue_size: int = LIVE_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.product_ids: set[int] = set()
+        self.category_ids: set[int] = set()
+        self.dropped = 0
+
+    def offer(self, message: dict) -> None:
+        """
+        Кладет сообщение в очередь; у медленного клиента вытесняется самое старое
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class LiveHub:
+    """
+    Fan-out of product deltas to this worker's subscribers of product ids or categories
+    """
+
+    def __init__(self):
+        self._by_product: dict[int, set[Subscriber]] = {}
+        self._by_category: dict[int, set[Subscriber]] = {}
+        self._notify_tasks: set[asyncio.Task] = set()
+
+    def subscribe(self, subscriber: Subscriber, product_ids: Iterable[int] = (), category_ids: Iterable[int] = ()) -> None:
+        self.unsubscribe(subscriber)
+        subscriber.product_ids = set(product_ids)
+        subscriber.category_ids = set(category_ids)
+        for product_id in subscriber.product_ids:
+            self._by_product.setdefault(product_id, set()).add(subscriber)
+        for category_id in subscriber.category_ids:
+            self._by_category.setdefault(category_id, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        for index, keys in ((self._by_product, subscriber.product_ids), (self._by_category, subscriber.category_ids)):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del index[key]
+
+    def publish_product(self, product, category_id: Optional[int] = None) -> None:
+        """
+        Рассылает компактную дельту товара подписчикам товара и его категории во всех воркерах
+        """
+        message = {
+            "type": "product",
+            "id": product.id,
+            "price": product.price,
+            "stock": product.stock,
+            "rating": float(product.rating) if product.rating is not None else None,
+            "is_active": product.is_active,
+        }
+        category_ids = [product.category_id]
+        if category_id is not None and category_id != product.category_id:
+            category_ids.append(category_id)
+        payload = json.dumps({"message": message, "category_ids": category_ids})
+        task = asyncio.get_running_loop().create_task(self._notify(payload))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify(self, payload: str) -> None:
+        try:
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": LIVE_CHANNEL, "payload": payload})
+                await connection.commit()
+        except Exception:
+            logger.exception("Failed to publish live update")
+
+    def dispatch(self, message: dict, category_ids: Iterable[int]) -> None:
+        """
+        Отдает дельту подписчикам этого воркера
+        """
+        targets = set(self._by_product.get(message["id"], ()))
+        for category_id in category_ids:
+            targets.update(self._by_category.get(category_id, ()))
+        for subscriber in targets:
+            subscriber.offer(message)
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            self.dispatch(data["message"], data["category_ids"])
+        except (ValueError, KeyError, TypeError):
+            logger.exception("Malformed live notification: %s", payload)
+
+    async def listen(self) -> None:
+        """
+        LISTEN на отдельном соединении воркера; при обрыве переподключается
+        """
+        while True:
+            try:
+                async with async_engine.connect() as connection:
+                    raw = (await connection.get_raw_connection()).driver_connection
+                    closed = asyncio.Event()
+                    raw.add_termination_listener(lambda _: closed.set())
+                    await raw.add_listener(LIVE_CHANNEL, self._on_notification)
+                    try:
+                        await closed.wait()
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(LIVE_CHANNEL, self._on_notification)
+                logger.warning("Live listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live listener failed, reconnecting")
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+
+
+hub = LiveHub()
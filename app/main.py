@@ -1,17 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.routers import categories, products, notes, users, reviews
+from app.routers import categories, products, notes, users, reviews, admin, changes, live
+from app.profiling import ProfilingMiddleware
+from app.slow_queries import RouteContextMiddleware
+from app.timeouts import CancelOnDisconnectMiddleware, database_error_handler
+from app.leaderboards import load_leaderboards, reload_leaderboards_periodically
+from app.autocomplete import load_autocomplete, reload_autocomplete_periodically
+from app.live import hub
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: build in-memory leaderboards and autocomplete index, then keep them in sync;
+    listen for live product updates published by any worker
+    """
+    await load_leaderboards()
+    await load_autocomplete()
+    reload_tasks = [
+        asyncio.create_task(reload_leaderboards_periodically()),
+        asyncio.create_task(reload_autocomplete_periodically()),
+        asyncio.create_task(hub.listen()),
+    ]
+    yield
+    for task in reload_tasks:
+        task.cancel()
+
 
 app = FastAPI(
     title="API Интернет-магазин",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RouteContextMiddleware)
+app.add_middleware(CancelOnDisconnectMiddleware)
+
+app.add_exception_handler(DBAPIError, database_error_handler)
+app.add_exception_handler(PoolTimeoutError, database_error_handler)
+
 app.include_router(categories.router)
 app.include_router(products.router)
 app.include_router(notes.router)
 app.include_router(users.router)
 app.include_router(reviews.router)
+app.include_router(admin.router)
+app.include_router(changes.router)
+app.include_router(live.router)
 
 @app.get("/")
 async def root():
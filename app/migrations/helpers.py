@@ -0,0 +1,152 @@
+"""Helpers for migrations on large tables (products, reviews).
+
+Conventions:
+
+* DDL that takes an ACCESS EXCLUSIVE lock goes inside ``ddl_timeouts()`` so a
+  migration stuck behind a long transaction fails fast instead of queueing
+  every request behind it.
+* Indexes are created with ``create_index_concurrently()`` - outside the
+  migration transaction, without blocking writes.
+* New columns are added nullable and without a volatile default
+  (``add_nullable_column()``), filled by ``backfill()`` in small committed
+  batches, and only then made NOT NULL with ``set_not_null()``.
+
+env.py runs every revision in its own transaction (transaction_per_migration),
+which ``autocommit_block()`` relies on. Autocommit steps make a revision
+partially applied if it dies midway, so every helper is safe to rerun: the
+same ``alembic upgrade`` continues where the failed one stopped.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from alembic import op
+
+logger = logging.getLogger("alembic.helpers")
+
+DEFAULT_LOCK_TIMEOUT = "5s"
+DEFAULT_STATEMENT_TIMEOUT = "60s"
+
+
+@contextmanager
+def ddl_timeouts(lock_timeout: str = DEFAULT_LOCK_TIMEOUT, statement_timeout: str = DEFAULT_STATEMENT_TIMEOUT):
+    """Limit lock wait and run time of the DDL inside the current migration transaction."""
+    op.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    op.execute(f"SET LOCAL statement_timeout = '{statement_timeout}'")
+    yield
+
+
+@contextmanager
+def _session_timeouts(lock_timeout: str, statement_timeout: str):
+    bind = op.get_bind()
+    bind.execute(sa.text(f"SET lock_timeout = '{lock_timeout}'"))
+    bind.execute(sa.text(f"SET statement_timeout = '{statement_timeout}'"))
+    try:
+        yield bind
+    finally:
+        bind.execute(sa.text("RESET lock_timeout"))
+        bind.execute(sa.text("RESET statement_timeout"))
+
+
+def create_index_concurrently(index_name: str, table_name: str, columns: list[str], unique: bool = False,
+                              lock_timeout: str = DEFAULT_LOCK_TIMEOUT, statement_timeout: str = "0", **kw) -> None:
+    """CREATE INDEX CONCURRENTLY outside the transaction; an invalid leftover of a failed run is rebuilt."""
+    with op.get_context().autocommit_block():
+        with _session_timeouts(lock_timeout, statement_timeout) as bind:
+            is_valid = bind.execute(
+                sa.text(
+                    "SELECT i.indisvalid FROM pg_index i "
+                    "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+                ),
+                {"name": index_name},
+            ).scalar()
+            if is_valid:
+                return
+            if is_valid is False:
+                op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+            op.create_index(index_name, table_name, columns, unique=unique, postgresql_concurrently=True, **kw)
+
+
+def drop_index_concurrently(index_name: str, table_name: str, lock_timeout: str = DEFAULT_LOCK_TIMEOUT) -> None:
+    """DROP INDEX CONCURRENTLY outside the transaction."""
+    with op.get_context().autocommit_block():
+        with _session_timeouts(lock_timeout, "0"):
+            op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+
+
+def add_nullable_column(table_name: str, column: sa.Column, lock_timeout: str = DEFAULT_LOCK_TIMEOUT) -> None:
+    """Add a column without rewriting the table: it must be nullable and have no server default."""
+    if not column.nullable or column.server_default is not None:
+        raise ValueError(
+            f"{table_name}.{column.name}: add the column nullable without server_default, "
+            "then backfill() and set_not_null()"
+        )
+    with ddl_timeouts(lock_timeout=lock_timeout):
+        # A crash in a later autocommit step leaves the column committed; the rerun must not fail on it
+        op.add_column(table_name, column, if_not_exists=True)
+
+
+def backfill(table_name: str, column_name: str, value_sql: str, batch_size: int = 5000,
+             pause: float = 0.1, key: str = "id") -> int:
+    """Fill NULLs of a column in committed keyset batches.
+
+    Each batch is its own transaction, so row locks are short and the work is
+    resumable: a rerun starts from the first row that is still NULL.
+    ``pause`` seconds between batches leave room for the regular traffic.
+    """
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_key = bind.execute(
+            sa.text(f"SELECT min({key}) - 1 FROM {table_name} WHERE {column_name} IS NULL")
+        ).scalar()
+        while last_key is not None:
+            upper_key = bind.execute(
+                sa.text(
+                    f"SELECT max({key}) FROM (SELECT {key} FROM {table_name} "
+                    f"WHERE {key} > :last_key ORDER BY {key} LIMIT :batch_size) batch"
+                ),
+                {"last_key": last_key, "batch_size": batch_size},
+            ).scalar()
+            if upper_key is None:
+                break
+            result = bind.execute(
+                sa.text(
+                    f"UPDATE {table_name} SET {column_name} = {value_sql} "
+                    f"WHERE {key} > :last_key AND {key} <= :upper_key AND {column_name} IS NULL"
+                ),
+                {"last_key": last_key, "upper_key": upper_key},
+            )
+            total += result.rowcount
+            logger.info("Backfill %s.%s: %s rows (up to %s=%s)", table_name, column_name, total, key, upper_key)
+            last_key = upper_key
+            time.sleep(pause)
+    return total
+
+
+def set_not_null(table_name: str, column_name: str, lock_timeout: str = DEFAULT_LOCK_TIMEOUT) -> None:
+    """SET NOT NULL without a long exclusive lock.
+
+    A NOT VALID check constraint is validated in its own transaction under a
+    weak lock, after which PostgreSQL (12+) skips the full table scan of
+    SET NOT NULL. Safe to rerun: an already NOT NULL column is skipped.
+    """
+    constraint = f"ck_{table_name}_{column_name}_not_null"
+    with op.get_context().autocommit_block():
+        with _session_timeouts(lock_timeout, "0") as bind:
+            is_nullable = bind.execute(
+                sa.text(
+                    "SELECT NOT a.attnotnull FROM pg_attribute a "
+                    "WHERE a.attrelid = CAST(:table AS regclass) AND a.attname = :column"
+                ),
+                {"table": table_name, "column": column_name},
+            ).scalar()
+            # A leftover of an interrupted run: the constraint may exist, the column may be NOT NULL already
+            op.execute(f"ALTER TABLE {table_name} DROP CONSTRAINT IF EXISTS {constraint}")
+            if not is_nullable:
+                return
+            op.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint} CHECK ({column_name} IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {constraint}")
+            op.alter_column(table_name, column_name, nullable=False)
+            op.drop_constraint(constraint, table_name, type_="check")
@@ -0,0 +1,156 @@
+"""Migration rehearsal against a seeded large local database under API load.
+
+Usage (local PostgreSQL from alembic.ini, API running on --api):
+
+    python -m app.migrations.rehearsal --products 2000000 --reviews 10000000
+
+The script migrates the database to --base, seeds it with generated rows,
+starts a load generator hitting the API and runs ``alembic upgrade --target``.
+It exits with a non-zero code if requests failed or the worst request latency
+during the migration exceeded --max-latency, i.e. the migration blocked the API.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text, make_url
+
+from app.database import async_engine
+
+SEED_STATEMENTS = (
+    "INSERT INTO users (email, hashed_password, is_active, role) "
+    "SELECT 'user' || n || '@example.com', 'x', true, CASE WHEN n % 10 = 0 THEN 'seller' ELSE 'buyer' END "
+    "FROM generate_series(1, :users) AS n",
+    "INSERT INTO categories (name, is_active, parent_id) "
+    "SELECT 'Category ' || n, true, NULL FROM generate_series(1, :categories) AS n",
+    "INSERT INTO products (name, description, price, image_url, stock, rating, is_active, category_id, seller_id) "
+    "SELECT 'Product ' || n, NULL, (random() * 1000)::numeric(10, 2) + 1, NULL, (random() * 100)::int + 1, NULL, true, "
+    "(SELECT min(id) FROM categories) + n % :categories, (SELECT min(id) FROM users) + (n % :users) "
+    "FROM generate_series(1, :products) AS n",
+    "INSERT INTO reviews (user_id, product_id, comment, comment_date, grade, is_active) "
+    "SELECT (SELECT min(id) FROM users) + n % :users, (SELECT min(id) FROM products) + n % :products, "
+    "'Review ' || n, now() - (n % 365) * interval '1 day', 1 + n % 5, true "
+    "FROM generate_series(1, :reviews) AS n",
+)
+
+
+async def seed(users: int, categories: int, products: int, reviews: int) -> None:
+    params = {"users": users, "categories": categories, "products": products, "reviews": reviews}
+    async with async_engine.begin() as connection:
+        for statement in SEED_STATEMENTS:
+            await connection.execute(text(statement), params)
+        await connection.execute(text("ANALYZE"))
+    await async_engine.dispose()
+
+
+class LoadGenerator:
+    """
+    Threads hitting read endpoints of the API, recording latencies and failures
+    """
+
+    def __init__(self, api: str, products: int, categories: int, workers: int):
+        self.api = api.rstrip("/")
+        self.products = products
+        self.categories = categories
+        self.workers = workers
+        self.latencies: list[float] = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def _url(self) -> str:
+        product_id = random.randint(1, self.products)
+        return random.choice((
+            f"{self.api}/products/{product_id}",
+            f"{self.api}/products/{product_id}/reviews",
+            f"{self.api}/products/category/{random.randint(1, self.categories)}",
+        ))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self._url(), timeout=30) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                if e.code >= 500:
+                    self.errors += 1
+            except OSError:
+                self.errors += 1
+            self.latencies.append(time.perf_counter() - started)
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="alembic.ini")
+    parser.add_argument("--base", default="748dc6de578f", help="Revision to seed at")
+    parser.add_argument("--target", default="head", help="Revision to rehearse")
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--reviews", type=int, default=5000000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-latency", type=float, default=2.0, help="Seconds")
+    args = parser.parse_args()
+
+    # downgrade/upgrade run against sqlalchemy.url from alembic.ini, the seed against the app engine
+    config = Config(args.config)
+    migration_url = make_url(config.get_main_option("sqlalchemy.url"))
+    if migration_url.host not in ("localhost", "127.0.0.1"):
+        print(f"Refusing to reset non-local database {migration_url.host}")
+        return 2
+    app_url = async_engine.url
+    if (app_url.host, app_url.port, app_url.database) != (migration_url.host, migration_url.port, migration_url.database):
+        print(f"{args.config} points at {migration_url.render_as_string()}, the app at {app_url.render_as_string()}")
+        return 2
+
+    command.downgrade(config, "base")
+    command.upgrade(config, args.base)
+    print(f"Seeding {args.products} products and {args.reviews} reviews...")
+    asyncio.run(seed(args.users, args.categories, args.products, args.reviews))
+
+    load = LoadGenerator(args.api, args.products, args.categories, args.workers)
+    load.start()
+    time.sleep(5)
+    baseline = len(load.latencies)
+
+    started = time.perf_counter()
+    command.upgrade(config, args.target)
+    duration = time.perf_counter() - started
+    load.stop()
+
+    during = load.latencies[baseline:] or [0.0]
+    worst = max(during)
+    print(f"Migration took {duration:.1f}s, {len(during)} requests during it, {load.errors} errors")
+    print(
+        f"Latency p50={statistics.median(during) * 1000:.0f}ms "
+        f"p99={sorted(during)[int(len(during) * 0.99)] * 1000:.0f}ms max={worst * 1000:.0f}ms"
+    )
+    if load.errors or worst > args.max_latency:
+        print("FAILED: the migration blocked the API")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
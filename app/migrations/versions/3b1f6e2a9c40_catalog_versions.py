@@ -0,0 +1,58 @@
+"""catalog versions
+
+Revision ID: 3b1f6e2a9c40
+Revises: 748dc6de578f
+Create Date: 2026-10-19 10:12:41.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import (
+    add_nullable_column,
+    backfill,
+    create_index_concurrently,
+    ddl_timeouts,
+    drop_index_concurrently,
+    set_not_null,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1f6e2a9c40'
+down_revision: Union[str, Sequence[str], None] = '748dc6de578f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('categories', 'products', 'reviews')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('catalog_version_seq'), if_not_exists=True))
+    for table in VERSIONED_TABLES:
+        add_nullable_column(table, sa.Column('version', sa.BigInteger(), nullable=True))
+        add_nullable_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Default only applies to new rows and does not rewrite the table
+        with ddl_timeouts():
+            op.alter_column(table, 'version', server_default=sa.text("nextval('catalog_version_seq')"))
+            op.alter_column(table, 'updated_at', server_default=sa.text('now()'))
+
+    for table in VERSIONED_TABLES:
+        backfill(table, 'version', "nextval('catalog_version_seq')")
+        backfill(table, 'updated_at', 'now()')
+        set_not_null(table, 'version')
+        set_not_null(table, 'updated_at')
+        create_index_concurrently(op.f(f'ix_{table}_version'), table, ['version'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(VERSIONED_TABLES):
+        drop_index_concurrently(op.f(f'ix_{table}_version'), table)
+        with ddl_timeouts():
+            op.drop_column(table, 'updated_at')
+            op.drop_column(table, 'version')
+    op.execute(sa.schema.DropSequence(sa.Sequence('catalog_version_seq')))
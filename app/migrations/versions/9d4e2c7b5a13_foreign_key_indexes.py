@@ -0,0 +1,32 @@
+"""foreign key indexes
+
+Revision ID: 9d4e2c7b5a13
+Revises: 3b1f6e2a9c40
+Create Date: 2026-10-19 11:03:27.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e2c7b5a13'
+down_revision: Union[str, Sequence[str], None] = '3b1f6e2a9c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently(op.f('ix_reviews_product_id'), 'reviews', ['product_id'])
+    create_index_concurrently(op.f('ix_products_category_id'), 'products', ['category_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently(op.f('ix_products_category_id'), 'products')
+    drop_index_concurrently(op.f('ix_reviews_product_id'), 'reviews')
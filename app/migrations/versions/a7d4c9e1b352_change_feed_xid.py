@@ -0,0 +1,52 @@
+"""change feed xid
+
+Revision ID: a7d4c9e1b352
+Revises: f61b3c8d2e05
+Create Date: 2026-10-19 18:04:51.320775
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import (
+    add_nullable_column,
+    backfill,
+    create_index_concurrently,
+    ddl_timeouts,
+    drop_index_concurrently,
+    set_not_null,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4c9e1b352'
+down_revision: Union[str, Sequence[str], None] = 'f61b3c8d2e05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('categories', 'products', 'reviews')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        add_nullable_column(table, sa.Column('version_xid', sa.BigInteger(), nullable=True))
+        with ddl_timeouts():
+            op.alter_column(table, 'version_xid', server_default=sa.text('(pg_current_xact_id()::text)::bigint'))
+
+    for table in VERSIONED_TABLES:
+        # Existing rows are long committed: xid 0 keeps them in version order before all new writes,
+        # so an old integer cursor keeps working as (0, version)
+        backfill(table, 'version_xid', '0')
+        set_not_null(table, 'version_xid')
+        create_index_concurrently(op.f(f'ix_{table}_version_xid_version'), table, ['version_xid', 'version'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(VERSIONED_TABLES):
+        drop_index_concurrently(op.f(f'ix_{table}_version_xid_version'), table)
+        with ddl_timeouts():
+            op.drop_column(table, 'version_xid')
@@ -0,0 +1,39 @@
+"""job watermarks
+
+Revision ID: b3e8f0a6d917
+Revises: a7d4c9e1b352
+Create Date: 2026-10-19 18:41:27.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import ddl_timeouts
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f0a6d917'
+down_revision: Union[str, Sequence[str], None] = 'a7d4c9e1b352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with ddl_timeouts():
+        op.drop_column('related_products', 'source_version')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with ddl_timeouts():
+        op.add_column('related_products', sa.Column('source_version', sa.BigInteger(), server_default='0', nullable=False))
+    op.drop_table('job_watermarks')
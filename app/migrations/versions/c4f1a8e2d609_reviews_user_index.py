@@ -0,0 +1,30 @@
+"""reviews user index
+
+Revision ID: c4f1a8e2d609
+Revises: b3e8f0a6d917
+Create Date: 2026-10-19 20:15:36.482190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a8e2d609'
+down_revision: Union[str, Sequence[str], None] = 'b3e8f0a6d917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('ix_reviews_user_id_product_id', 'reviews', ['user_id', 'product_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_reviews_user_id_product_id', 'reviews')
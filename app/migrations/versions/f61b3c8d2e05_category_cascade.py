@@ -0,0 +1,40 @@
+"""category cascade
+
+Revision ID: f61b3c8d2e05
+Revises: e2a97b4f6c81
+Create Date: 2026-10-19 15:31:12.664207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.migrations.helpers import (
+    add_nullable_column,
+    create_index_concurrently,
+    ddl_timeouts,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f61b3c8d2e05'
+down_revision: Union[str, Sequence[str], None] = 'e2a97b4f6c81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    add_nullable_column('categories', sa.Column('deactivated_by_id', sa.Integer(), nullable=True))
+    add_nullable_column('products', sa.Column('deactivated_by_id', sa.Integer(), nullable=True))
+    create_index_concurrently(op.f('ix_categories_parent_id'), 'categories', ['parent_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently(op.f('ix_categories_parent_id'), 'categories')
+    with ddl_timeouts():
+        op.drop_column('products', 'deactivated_by_id')
+        op.drop_column('categories', 'deactivated_by_id')
@@ -2,6 +2,9 @@ from .categories import Category
 from .products import Product
 from .users import User
 from .reviews import Review
+from .related_products import RelatedProduct
+from .product_scores import ProductScore
+from .job_watermarks import JobWatermark
 
 
-__all__ = ['Category', 'Product', 'User', 'Review']
\ No newline at end of file
+__all__ = ['Category', 'Product', 'User', 'Review', 'RelatedProduct', 'ProductScore', 'JobWatermark']
\ No newline at end of file
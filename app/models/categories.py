@@ -3,14 +3,17 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, Optional
 
 from app.database import Base
+from app.models.versioning import VersionedMixin, version_xid_index
 
-class Category(Base):
+class Category(VersionedMixin, Base):
     __tablename__ = 'categories'
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    parent_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id"), nullable=True)
+    parent_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
+    # Корень каскадной деактивации категорий, выключившей эту строку
+    deactivated_by_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     products: Mapped[List["Product"]] = relationship(
         "Product",
@@ -24,4 +27,8 @@ class Category(Base):
     children: Mapped[List["Category"]] = relationship(
         "Category",
         back_populates="parent",
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        version_xid_index("categories"),
+    )
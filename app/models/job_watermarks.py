@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, String, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.database import Base
+
+class JobWatermark(Base):
+    __tablename__ = "job_watermarks"
+
+    # Имя фонового задания, например related_products
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Все изменения ниже этой отметки уже обработаны заданием
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
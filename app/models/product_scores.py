@@ -0,0 +1,16 @@
+from sqlalchemy import Boolean, Float, Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+
+from app.database import Base
+
+class ProductScore(Base):
+    __tablename__ = "product_scores"
+
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, ForeignKey("categories.id"), nullable=False)
+    grade_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # log(sum(exp((t_review - epoch) / tau))) - порядок не меняется со временем
+    trend_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 
 from app.database import Base
+from app.models.versioning import VersionedMixin, version_xid_index
 
-class Product(Base):
+class Product(VersionedMixin, Base):
     __tablename__ = 'products'
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -15,8 +16,10 @@ class Product(Base):
     stock: Mapped[int] = mapped_column(Integer, nullable=False)
     rating: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), default=None)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    category_id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id'), nullable=False)
+    category_id: Mapped[int] = mapped_column(Integer, ForeignKey('categories.id'), nullable=False, index=True)
     seller_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
+    # Корень каскадной деактивации категорий, выключившей эту строку
+    deactivated_by_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     category: Mapped["Category"] = relationship(
         "Category",
@@ -29,4 +32,8 @@ class Product(Base):
     reviews: Mapped[list["Review"]] = relationship(
         "Review",
         back_populates="product",
-    )
\ No newline at end of file
+    )
+
+    __table_args__ = (
+        version_xid_index("products"),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Float, Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+class RelatedProduct(Base):
+    __tablename__ = "related_products"
+
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+    related_product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
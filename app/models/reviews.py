@@ -1,16 +1,17 @@
-from sqlalchemy import Boolean, Text, Integer, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Boolean, Text, Integer, ForeignKey, DateTime, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 from typing import Optional
 from datetime import datetime
 
 from app.database import Base
+from app.models.versioning import VersionedMixin, version_xid_index
 
-class Review(Base):
+class Review(VersionedMixin, Base):
     __tablename__ = "reviews"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
-    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), index=True)
     comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     comment_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     grade: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -21,4 +22,7 @@ class Review(Base):
 
     __table_args__ = (
         CheckConstraint('grade BETWEEN 1 AND 5', name='ck_grade_range'),
+        version_xid_index("reviews"),
+        # Выборка всех отзывов рецензентов в app.related_products
+        Index("ix_reviews_user_id_product_id", "user_id", "product_id"),
     )
\ No newline at end of file
@@ -0,0 +1,46 @@
+from sqlalchemy import BigInteger, DateTime, Index, Sequence, Text, cast, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.database import Base
+
+# Общая последовательность версий для products, categories и reviews:
+# любая вставка или изменение строки получает новый, строго больший номер.
+catalog_version_seq = Sequence("catalog_version_seq", metadata=Base.metadata)
+
+# Номер (xid8) транзакции, записавшей строку. Версии выдаются до коммита, поэтому
+# строка с меньшей версией может стать видимой позже; лента изменений упорядочена
+# по (version_xid, version) и отдает только строки уже завершенных транзакций.
+CURRENT_XID_SQL = "(pg_current_xact_id()::text)::bigint"
+
+
+class VersionedMixin:
+    """
+    Version/version_xid/updated_at columns maintained by every INSERT and UPDATE (ORM and Core)
+    """
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=catalog_version_seq.next_value(),
+        onupdate=catalog_version_seq.next_value(),
+        nullable=False,
+        index=True,
+    )
+    version_xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text(CURRENT_XID_SQL),
+        onupdate=cast(cast(func.pg_current_xact_id(), Text), BigInteger),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+def version_xid_index(table_name: str) -> Index:
+    """
+    Индекс для постраничного чтения ленты изменений по (version_xid, version)
+    """
+    return Index(f"ix_{table_name}_version_xid_version", "version_xid", "version")
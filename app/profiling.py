@@ -0,0 +1,183 @@
+import asyncio
+import cProfile
+import json
+import os
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+import jwt
+from sqlalchemy import event, select
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.cache import TTLCache
+from app.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_DIR,
+    PROFILE_RING_SIZE,
+    PROFILE_ADMIN_CACHE_TTL,
+)
+from app.database import async_engine, async_session_maker
+from app.models import User as UserModel
+
+PROFILE_HEADER = "X-Profile-Token"
+
+# SQL-таймлайн текущего профилируемого запроса (None - запрос не профилируется)
+_sql_timeline: ContextVar[Optional[dict]] = ContextVar("sql_timeline", default=None)
+
+# cProfile работает на весь поток, поэтому одновременно профилируется только один запрос
+_profile_lock = asyncio.Lock()
+
+# Запросы, обрабатываемые воркером сейчас, и счетчик наложившихся на активный профиль
+_in_flight = 0
+_overlap: Optional[dict] = None
+
+# email -> является ли пользователь активным администратором (проверка по БД, а не по claim токена)
+_admin_cache = TTLCache(ttl=PROFILE_ADMIN_CACHE_TTL)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_timeline.get() is not None:
+        # В контексте выполнения, а не стеком на соединении: упавший запрос не оставит лишней записи
+        context._profile_started = time.perf_counter()
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timeline = _sql_timeline.get()
+    started = getattr(context, "_profile_started", None)
+    if timeline is not None and started is not None:
+        timeline["sql"].append({
+            "statement": statement,
+            "started_ms": round((started - timeline["origin"]) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        })
+
+
+async def _is_active_admin(email: str) -> bool:
+    is_admin = _admin_cache.get(email)
+    if is_admin is None:
+        async with async_session_maker() as db:
+            role = await db.scalar(
+                select(UserModel.role).where(UserModel.email == email, UserModel.is_active == True)
+            )
+        is_admin = role == "admin"
+        _admin_cache.set(email, is_admin)
+    return is_admin
+
+
+async def is_profiling_requested(request: Request) -> bool:
+    """
+    Профилирование включается access-токеном активного администратора или по sample rate
+    """
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            return False
+        # Refresh-токены живут неделю и не должны давать доступ; роль в токене могла устареть
+        if payload.get("token_type") != "access" or payload.get("sub") is None:
+            return False
+        return await _is_active_admin(payload["sub"])
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def list_profiles() -> list[dict]:
+    """
+    Метаданные сохраненных профилей, новые первыми
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+    return profiles
+
+
+def get_profile_path(profile_id: str) -> Optional[str]:
+    """
+    Путь к файлу .prof по id профиля или None
+    """
+    if os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.isfile(path) else None
+
+
+def _save_profile(profiler: cProfile.Profile, meta: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{meta['id']}.prof"))
+    with open(os.path.join(PROFILE_DIR, f"{meta['id']}.json"), "w") as f:
+        json.dump(meta, f)
+
+    # Кольцевой буфер: удаляем самые старые профили сверх PROFILE_RING_SIZE
+    ids = sorted(name[:-5] for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for old_id in ids[:-PROFILE_RING_SIZE] if PROFILE_RING_SIZE > 0 else ids:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Opt-in profiling of a single request: cProfile stats plus SQL timeline.
+
+    For diagnosing one request, not for load: cProfile sees the whole event-loop
+    thread, so work of requests running at the same time lands in the profile too.
+    Only one request per worker is profiled at a time; the others run unprofiled,
+    and the number of requests that overlapped is saved as overlapping_requests.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        global _in_flight
+        _in_flight += 1
+        try:
+            if _overlap is not None:
+                _overlap["requests"] += 1
+            if not await is_profiling_requested(request) or _profile_lock.locked():
+                return await call_next(request)
+            return await self._profile(request, call_next)
+        finally:
+            _in_flight -= 1
+
+    async def _profile(self, request: Request, call_next):
+        global _overlap
+        async with _profile_lock:
+            _overlap = {"requests": _in_flight - 1}
+            started = time.perf_counter()
+            timeline = {"origin": started, "sql": []}
+            token = _sql_timeline.set(timeline)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = await call_next(request)
+            finally:
+                profiler.disable()
+                _sql_timeline.reset(token)
+                overlapping, _overlap = _overlap["requests"], None
+
+            profile_id = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+            meta = {
+                "id": profile_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "overlapping_requests": overlapping,
+                "sql": timeline["sql"],
+            }
+            await asyncio.to_thread(_save_profile, profiler, meta)
+
+        response.headers["X-Profile-Id"] = profile_id
+        return response
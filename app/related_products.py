@@ -0,0 +1,207 @@
+"""Offline job: "customers who reviewed this also reviewed".
+
+Builds item-item cosine similarity over the (user_id, product_id, grade) matrix
+of active reviews and keeps the top-K neighbours per product in
+related_products. Incremental runs only recompute products whose reviews
+changed since the last completed run: the job_watermarks row stores the xid
+bound of that run, and reviews written by later transactions
+(reviews.version_xid) are dirty. The watermark only moves after the last
+chunk commits, so an interrupted run is redone from the same point.
+
+    python -m app.related_products          # incremental
+    python -m app.related_products --full   # rebuild every product
+"""
+import argparse
+import asyncio
+import logging
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, delete, insert, func, distinct, text, bindparam, any_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import RELATED_PRODUCTS_TOP_K, RELATED_PRODUCTS_MAX_USER_REVIEWS, RELATED_PRODUCTS_SHRINKAGE
+from app.database import async_session_maker
+from app.models import (
+    Product as ProductModel,
+    Review as ReviewModel,
+    RelatedProduct as RelatedProductModel,
+    JobWatermark as JobWatermarkModel,
+)
+
+logger = logging.getLogger("app.related_products")
+
+CHUNK_SIZE = 2000
+WATERMARK_NAME = "related_products"
+
+
+def compute_top_k(user_ids: np.ndarray, product_ids: np.ndarray, grades: np.ndarray,
+                  targets: np.ndarray, norm_ids: np.ndarray, norm_values: np.ndarray,
+                  k: int = RELATED_PRODUCTS_TOP_K, shrinkage: float = RELATED_PRODUCTS_SHRINKAGE):
+    """
+    Top-K neighbours of the target products.
+
+    score(a, b) = sum_u g_ua * g_ub / (|a| * |b|) * n_ab / (n_ab + shrinkage),
+    where |a| is the norm of all grades of a and n_ab the number of co-reviewers;
+    repeated reviews of one user on one product count once, with their mean grade.
+    Returns (product_id, rank, related_product_id, score) arrays.
+    """
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64))
+    if len(user_ids) == 0:
+        return empty
+
+    order = np.lexsort((product_ids, user_ids))
+    user_ids, product_ids, grades = user_ids[order], product_ids[order], grades[order].astype(np.float64)
+    # Несколько отзывов пользователя на один товар сворачиваются в среднюю оценку
+    first = np.ones(len(user_ids), dtype=bool)
+    first[1:] = (user_ids[1:] != user_ids[:-1]) | (product_ids[1:] != product_ids[:-1])
+    if not first.all():
+        review_group = np.cumsum(first) - 1
+        grades = np.bincount(review_group, weights=grades) / np.bincount(review_group)
+        user_ids, product_ids = user_ids[first], product_ids[first]
+    items, item_index = np.unique(product_ids, return_inverse=True)
+    n_items = len(items)
+
+    # Пары отзывов одного пользователя: строка i группы g сочетается с каждой строкой группы g.
+    # Слева разворачиваются только отзывы на целевые товары - остальные пары не нужны
+    _, starts, counts = np.unique(user_ids, return_index=True, return_counts=True)
+    group = np.repeat(np.arange(len(starts)), counts)
+    target_rows = np.flatnonzero(np.isin(items, targets)[item_index])
+    reps = counts[group[target_rows]]
+    left = np.repeat(target_rows, reps)
+    right = np.repeat(starts[group[target_rows]], reps) + (np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps))
+
+    # Не только строка сама с собой: товар не может быть похож сам на себя
+    mask = item_index[left] != item_index[right]
+    left, right = left[mask], right[mask]
+    if len(left) == 0:
+        return empty
+
+    keys = item_index[left].astype(np.int64) * n_items + item_index[right]
+    pairs, pair_index = np.unique(keys, return_inverse=True)
+    dot = np.bincount(pair_index, weights=grades[left] * grades[right])
+    co_reviewers = np.bincount(pair_index)
+    pair_left, pair_right = pairs // n_items, pairs % n_items
+
+    norms = np.zeros(n_items)
+    norm_position = np.searchsorted(norm_ids, items)
+    known = (norm_position < len(norm_ids)) & (norm_ids[np.minimum(norm_position, len(norm_ids) - 1)] == items)
+    norms[known] = norm_values[norm_position[known]]
+    denominator = norms[pair_left] * norms[pair_right]
+    score = np.divide(dot, denominator, out=np.zeros_like(dot), where=denominator > 0)
+    score *= co_reviewers / (co_reviewers + shrinkage)
+
+    order = np.lexsort((-score, pair_left))
+    pair_left, pair_right, score = pair_left[order], pair_right[order], score[order]
+    _, first, per_item = np.unique(pair_left, return_index=True, return_counts=True)
+    rank = np.arange(len(pair_left)) - np.repeat(first, per_item)
+    keep = (rank < k) & (score > 0)
+    return items[pair_left[keep]], rank[keep], items[pair_right[keep]], score[keep]
+
+
+async def _load_reviews(db: AsyncSession, targets: list[int]):
+    """
+    Отзывы всех пользователей, оценивших целевые товары (последние N на пользователя)
+    """
+    reviewers = select(ReviewModel.user_id).where(ReviewModel.product_id.in_(targets), ReviewModel.is_active == True)
+    ranked = (
+        select(
+            ReviewModel.user_id,
+            ReviewModel.product_id,
+            ReviewModel.grade,
+            func.row_number().over(partition_by=ReviewModel.user_id, order_by=ReviewModel.comment_date.desc()).label("rn"),
+        )
+        .join(ProductModel, ProductModel.id == ReviewModel.product_id)
+        .where(ReviewModel.user_id.in_(reviewers), ReviewModel.is_active == True, ProductModel.is_active == True)
+        .subquery()
+    )
+    result = await db.execute(
+        select(ranked.c.user_id, ranked.c.product_id, ranked.c.grade).where(ranked.c.rn <= RELATED_PRODUCTS_MAX_USER_REVIEWS)
+    )
+    rows = np.array(result.all(), dtype=np.int64).reshape(-1, 3)
+    return rows[:, 0], rows[:, 1], rows[:, 2]
+
+
+async def _load_norms(db: AsyncSession, product_ids: np.ndarray):
+    """
+    Нормы оценок товаров; повторные отзывы пользователя берутся средним, как в compute_top_k
+    """
+    # Один параметр-массив вместо IN-списка: asyncpg не принимает больше 32767 параметров
+    ids = bindparam("product_ids", product_ids.tolist(), type_=ARRAY(Integer))
+    per_user = (
+        select(ReviewModel.product_id, func.avg(ReviewModel.grade).label("grade"))
+        .where(ReviewModel.product_id == any_(ids), ReviewModel.is_active == True)
+        .group_by(ReviewModel.product_id, ReviewModel.user_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(per_user.c.product_id, func.sqrt(func.sum(per_user.c.grade * per_user.c.grade)))
+        .group_by(per_user.c.product_id)
+        .order_by(per_user.c.product_id)
+    )
+    rows = result.all()
+    return np.array([row[0] for row in rows], dtype=np.int64), np.array([row[1] for row in rows], dtype=np.float64)
+
+
+async def _dirty_products(db: AsyncSession, watermark: Optional[int], new_watermark: int) -> list[int]:
+    if watermark is None:
+        dirty = select(distinct(ReviewModel.product_id)).where(ReviewModel.is_active == True).union(
+            select(distinct(RelatedProductModel.product_id))
+        )
+    else:
+        dirty = select(distinct(ReviewModel.product_id)).where(
+            ReviewModel.version_xid >= watermark, ReviewModel.version_xid < new_watermark
+        )
+    return sorted((await db.scalars(dirty)).all())
+
+
+async def refresh_related_products(full: bool = False) -> int:
+    """
+    Recompute related products for changed (or all) products; returns the number of products processed
+    """
+    async with async_session_maker() as db:
+        watermark = None if full else await db.scalar(
+            select(JobWatermarkModel.value).where(JobWatermarkModel.name == WATERMARK_NAME)
+        )
+        # Транзакции с xid ниже xmin снимка завершены: их отзывы учитываются в этом запуске
+        new_watermark = await db.scalar(text("SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint"))
+        dirty = await _dirty_products(db, watermark, new_watermark)
+
+        for offset in range(0, len(dirty), CHUNK_SIZE):
+            targets = dirty[offset:offset + CHUNK_SIZE]
+            user_ids, product_ids, grades = await _load_reviews(db, targets)
+            norm_ids, norm_values = await _load_norms(db, np.unique(product_ids))
+            product, rank, related, score = compute_top_k(
+                user_ids, product_ids, grades, np.array(targets, dtype=np.int64), norm_ids, norm_values
+            )
+
+            await db.execute(delete(RelatedProductModel).where(RelatedProductModel.product_id.in_(targets)))
+            if len(product):
+                await db.execute(
+                    insert(RelatedProductModel),
+                    [
+                        {"product_id": int(p), "rank": int(r), "related_product_id": int(rp), "score": float(s)}
+                        for p, r, rp, s in zip(product, rank, related, score)
+                    ],
+                )
+            await db.commit()
+            logger.info("Related products: %s/%s products done", min(offset + CHUNK_SIZE, len(dirty)), len(dirty))
+
+        # Отметка двигается только после последней порции: прерванный запуск повторится целиком
+        await db.execute(
+            pg_insert(JobWatermarkModel)
+            .values(name=WATERMARK_NAME, value=new_watermark)
+            .on_conflict_do_update(index_elements=[JobWatermarkModel.name], set_={"value": new_watermark})
+        )
+        await db.commit()
+
+    return len(dirty)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild related products")
+    parser.add_argument("--full", action="store_true", help="Recompute every product")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(f"Processed {asyncio.run(refresh_related_products(full=args.full))} products")
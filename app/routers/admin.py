@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.models.users import User as UserModel
+from app.auth import get_current_admin
+from app.profiling import list_profiles, get_profile_path
+from app.slow_queries import get_slow_queries, reset_slow_queries
+from app.cache import product_cache, product_reviews_cache
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+)
+
+
+@router.get("/profiles", status_code=status.HTTP_200_OK)
+async def get_profiles(current_user: UserModel = Depends(get_current_admin)):
+    """
+    Return saved request profiles (newest first)
+    """
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}", status_code=status.HTTP_200_OK)
+async def download_profile(profile_id: str, current_user: UserModel = Depends(get_current_admin)):
+    """
+    Download cProfile stats of a saved profile
+    """
+    path = get_profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+@router.get("/slow-queries", status_code=status.HTTP_200_OK)
+async def get_slow_query_log(current_user: UserModel = Depends(get_current_admin)):
+    """
+    Return slow queries aggregated by fingerprint (most total time first)
+    """
+    return get_slow_queries()
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_200_OK)
+async def clear_slow_query_log(current_user: UserModel = Depends(get_current_admin)):
+    """
+    Reset slow query aggregates
+    """
+    reset_slow_queries()
+    return {"status": "success", "message": "Slow query log cleared"}
+
+
+@router.get("/cache-stats", status_code=status.HTTP_200_OK)
+async def get_cache_stats(current_user: UserModel = Depends(get_current_admin)):
+    """
+    Return hit/miss/coalesced counters of the product read caches
+    """
+    return {"products": product_cache.get_stats(), "product_reviews": product_reviews_cache.get_stats()}
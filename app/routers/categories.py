@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
@@ -6,7 +6,12 @@ from typing import List
 
 from app.models.categories import Category as CategoryModel
 from app.db_depends import get_db, get_async_db
-from app.schemas import Category as CategorySchema, CategoryCreate
+from app.schemas import Category as CategorySchema, CategoryCreate, LeaderboardEntry as LeaderboardEntrySchema
+from app.config import LEADERBOARD_SIZE
+from app.leaderboards import leaderboards, set_products_active
+from app.autocomplete import autocomplete_index
+from app.cache import product_cache, product_reviews_cache, product_detail_cache
+from app.routers.utils import deactivate_category_subtree, reactivate_category_subtree, cascade_product_ids
 
 router = APIRouter(
     prefix="/categories",
@@ -41,6 +46,7 @@ async def create_category(category: CategoryCreate, db: AsyncSession = Depends(g
     db.add(db_category)
     await db.commit()
     await db.refresh(db_category)
+    autocomplete_index.add("category", db_category.id, db_category.name)
 
     return db_category
 
@@ -67,6 +73,8 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
     )
     await db.commit()
     await db.refresh(category_db)
+    if category_db.is_active:
+        autocomplete_index.add("category", category_id, category_db.name)
 
     return category_db
 
@@ -74,18 +82,86 @@ async def update_category(category_id: int, category: CategoryCreate, db: AsyncS
 @router.delete("/{category_id}", status_code=status.HTTP_200_OK)
 async def delete_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
     """
-    Delete a category
+    Delete a category with all its subcategories and their products
     """
     category_stmt = select(CategoryModel).where(CategoryModel.id == category_id)
     category_crtn = await db.scalars(category_stmt)
     if category_crtn.first() is None:
-        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    await db.execute(
-        update(CategoryModel)
-        .where(CategoryModel.id == category_id)
-        .values(is_active=False))
+    category_ids, products = await deactivate_category_subtree(category_id, db)
+    score_rows = await set_products_active(db, cascade_product_ids(category_id), False)
+    await db.commit()
+
+    for row in score_rows:
+        leaderboards.apply(row)
+    for category in category_ids:
+        autocomplete_index.remove("category", category)
+    for product_id, _ in products:
+        autocomplete_index.remove("product", product_id)
+        _invalidate_product(product_id)
+
+    return {
+        "status": "success",
+        "message": "Category marked as inactive",
+        "categories": len(category_ids),
+        "products": len(products),
+    }
+
+
+@router.post("/{category_id}/activate", status_code=status.HTTP_200_OK)
+async def activate_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Reactivate a category and everything its deactivation switched off
+    """
+    category_stmt = select(CategoryModel).where(CategoryModel.id == category_id)
+    category_crtn = await db.scalars(category_stmt)
+    category_db = category_crtn.first()
+    if category_db is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    if category_db.parent_id is not None:
+        parent = await db.get(CategoryModel, category_db.parent_id)
+        if not parent.is_active:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Parent category is inactive")
+
+    # Пока метка каскада не снята, ею же выбираются строки product_scores
+    score_rows = await set_products_active(db, cascade_product_ids(category_id), True)
+    categories, products = await reactivate_category_subtree(category_id, db)
     await db.commit()
 
-    return {"status": "success", "message": "Category marked as inactive"}
+    for row in score_rows:
+        leaderboards.apply(row)
+    for category, name in categories:
+        autocomplete_index.add("category", category, name)
+    for product_id, name in products:
+        autocomplete_index.add("product", product_id, name)
+        _invalidate_product(product_id)
+
+    return {
+        "status": "success",
+        "message": "Category marked as active",
+        "categories": len(categories),
+        "products": len(products),
+    }
+
+
+def _invalidate_product(product_id: int) -> None:
+    product_cache.invalidate(product_id)
+    product_reviews_cache.invalidate(product_id)
+    product_detail_cache.invalidate(product_id)
+
 
+@router.get("/{category_id}/top", response_model=List[LeaderboardEntrySchema], status_code=status.HTTP_200_OK)
+async def get_top_rated(category_id: int, limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE)):
+    """
+    Top rated products of a category (precomputed leaderboard)
+    """
+    return leaderboards.get_top_rated(category_id, limit)
+
+
+@router.get("/{category_id}/trending", response_model=List[LeaderboardEntrySchema], status_code=status.HTTP_200_OK)
+async def get_trending(category_id: int, limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE)):
+    """
+    Trending products of a category (time-decayed review activity)
+    """
+    return leaderboards.get_trending(category_id, limit)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, tuple_
+
+from app.models import Product as ProductModel, Category as CategoryModel, Review as ReviewModel
+from app.db_depends import get_async_db
+from app.timeouts import statement_timeout
+from app.schemas import (
+    ChangeFeed as ChangeFeedSchema,
+    Product as ProductSchema,
+    Category as CategorySchema,
+    Review as ReviewSchema,
+)
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+)
+
+FEED_SOURCES = (
+    ("product", ProductModel, ProductSchema),
+    ("category", CategoryModel, CategorySchema),
+    ("review", ReviewModel, ReviewSchema),
+)
+
+
+def parse_cursor(cursor: str) -> tuple[int, int]:
+    """
+    Курсор "<xid>:<version>"; старый целочисленный курсор читается как (0, version)
+    """
+    try:
+        xid, _, version = cursor.rpartition(":")
+        position = (int(xid) if xid else 0, int(version))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor")
+    if position[0] < 0 or position[1] < 0:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor")
+    return position
+
+
+@router.get("/", response_model=ChangeFeedSchema, status_code=status.HTTP_200_OK)
+@statement_timeout(10000)
+async def get_changes(
+        since: str = Query("0", description="Cursor from the previous response"),
+        limit: int = Query(500, ge=1, le=5000),
+        db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Return upserts and tombstones after the cursor in commit order
+    """
+    position = parse_cursor(since)
+    # Транзакции с xid ниже xmin текущего снимка завершены, а новые получат xid больше:
+    # строк с таким xid больше не появится, поэтому курсор их никогда не перепрыгнет
+    settled_xid = await db.scalar(text("SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint"))
+    entries = []
+    for entity, model, schema in FEED_SOURCES:
+        rows_crtn = await db.scalars(
+            select(model)
+            .where(tuple_(model.version_xid, model.version) > tuple_(*position), model.version_xid < settled_xid)
+            .order_by(model.version_xid, model.version)
+            .limit(limit)
+        )
+        for row in rows_crtn.all():
+            entries.append(((row.version_xid, row.version), {
+                "entity": entity,
+                "id": row.id,
+                "version": row.version,
+                "op": "upsert" if row.is_active else "delete",
+                "data": schema.model_validate(row, from_attributes=True).model_dump(mode="json") if row.is_active else None,
+            }))
+
+    entries.sort(key=lambda entry: entry[0])
+    entries = entries[:limit]
+    if entries:
+        position = entries[-1][0]
+    changes = [change for _, change in entries]
+    return {"changes": changes, "next_cursor": f"{position[0]}:{position[1]}"}
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from app.config import LIVE_MAX_SUBSCRIPTIONS, LIVE_KEEPALIVE_SECONDS
+from app.live import hub, Subscriber
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+)
+
+
+def parse_ids(raw: str | list | None) -> set[int]:
+    """
+    Принимает "1,2,3" или список id
+    """
+    if not raw:
+        return set()
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    ids = {int(item) for item in raw}
+    if len(ids) > LIVE_MAX_SUBSCRIPTIONS:
+        raise ValueError(f"Too many ids (max {LIVE_MAX_SUBSCRIPTIONS})")
+    return ids
+
+
+@router.websocket("/ws")
+async def live_websocket(websocket: WebSocket):
+    """
+    Client sends {"products": [...], "categories": [...]} to (re)subscribe and receives product deltas
+    """
+    await websocket.accept()
+    subscriber = Subscriber()
+
+    async def receive_subscriptions():
+        while True:
+            try:
+                # ValueError: кадр не JSON; KeyError: бинарный кадр вместо текстового
+                data = await websocket.receive_json()
+                hub.subscribe(subscriber, parse_ids(data.get("products")), parse_ids(data.get("categories")))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e) or type(e).__name__})
+                continue
+            await websocket.send_json({
+                "type": "subscribed",
+                "products": sorted(subscriber.product_ids),
+                "categories": sorted(subscriber.category_ids),
+            })
+
+    async def send_updates():
+        while True:
+            message = await subscriber.queue.get()
+            await websocket.send_json(message)
+
+    tasks = [asyncio.create_task(receive_subscriptions()), asyncio.create_task(send_updates())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscriber)
+
+
+@router.get("/sse", status_code=status.HTTP_200_OK)
+async def live_sse(
+        request: Request,
+        products: str | None = Query(None, description="Comma-separated product IDs"),
+        categories: str | None = Query(None, description="Comma-separated category IDs"),
+):
+    """
+    Server-Sent Events fallback for clients without WebSocket
+    """
+    try:
+        product_ids, category_ids = parse_ids(products), parse_ids(categories)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    subscriber = Subscriber()
+    hub.subscribe(subscriber, product_ids, category_ids)
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
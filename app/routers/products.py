@@ -1,17 +1,31 @@
+import asyncio
 from itertools import product
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload, aliased
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_, func
-from typing import List
+from sqlalchemy import select, update, and_, func, literal
+from typing import List, Literal, Optional
 
-from app.models import Product as ProductModel, Category as CategoryModel
+from app.models import Product as ProductModel, Category as CategoryModel, RelatedProduct as RelatedProductModel
 from app.db_depends import get_db, get_async_db
-from app.schemas import Product as ProductSchema, ProductCreate, Review as ReviewSchema
+from app.schemas import (
+    Product as ProductSchema, ProductCreate, Review as ReviewSchema, ProductDetail as ProductDetailSchema,
+    AutocompleteItem as AutocompleteItemSchema,
+)
 from app.models.users import User as UserModel
 from app.models.reviews import Review as ReviewModel
 from app.auth import get_current_seller
+from app.live import hub
+from app.autocomplete import autocomplete_index
+from app.leaderboards import record_product
+from app.cache import product_cache, product_reviews_cache, product_detail_cache
+from app.config import PRODUCT_DETAIL_REVIEWS, DB_STATEMENT_TIMEOUT_MS
+from app.timeouts import statement_timeout
+from app.catalog_snapshot import get_snapshot
+from app.database import async_session_maker
 
 
 router = APIRouter(
@@ -19,14 +33,52 @@ router = APIRouter(
     tags=["products"],
 )
 
+review_list_adapter = TypeAdapter(List[ReviewSchema])
+
+
+
+SORT_COLUMNS = {
+    "id": ProductModel.id,
+    "price": ProductModel.price,
+    "rating": ProductModel.rating,
+    "stock": ProductModel.stock,
+}
+
+
+def _sorted_products_stmt(sort_by: str, order: str, min_price: Optional[float], max_price: Optional[float]):
+    """
+    Запрос для отката на БД с теми же фильтрами и порядком, что и у снимка
+    """
+    stmt = select(ProductModel).where(ProductModel.is_active == True)
+    if min_price is not None:
+        stmt = stmt.where(ProductModel.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(ProductModel.price <= max_price)
+    column = SORT_COLUMNS[sort_by]
+    if sort_by == "id":
+        return stmt.order_by(column.desc() if order == "desc" else column)
+    return stmt.order_by((column.desc() if order == "desc" else column.asc()).nulls_last(), ProductModel.id)
 
 
 @router.get("/", response_model=List[ProductSchema], status_code=status.HTTP_200_OK)
-async def get_all_products(db: AsyncSession = Depends(get_async_db)):
+@statement_timeout(3000)
+async def get_all_products(
+        sort_by: Literal["id", "price", "rating", "stock"] = Query("id"),
+        order: Literal["asc", "desc"] = Query("asc"),
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        db: AsyncSession = Depends(get_async_db),
+):
     """
     Return all products
     """
-    product_stmt = select(ProductModel).where(ProductModel.is_active == True).order_by(ProductModel.id)
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return JSONResponse(content=snapshot.list_products(
+            sort_by=sort_by, descending=order == "desc", min_price=min_price, max_price=max_price,
+        ))
+
+    product_stmt = _sorted_products_stmt(sort_by, order, min_price, max_price)
     product_crtn = await db.scalars(product_stmt)
     product_db = product_crtn.all()
     return product_db
@@ -51,41 +103,86 @@ async def create_product(
     db.add(db_product)
     await db.commit()
     await db.refresh(db_product)
+    product_cache.invalidate(db_product.id)
+    product_reviews_cache.invalidate(db_product.id)
+    autocomplete_index.add("product", db_product.id, db_product.name)
 
     return db_product
 
 
 @router.get("/category/{category_id}", response_model=List[ProductSchema], status_code=status.HTTP_200_OK)
-async def get_products_by_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+@statement_timeout(2000)
+async def get_products_by_category(
+        category_id: int,
+        sort_by: Literal["id", "price", "rating", "stock"] = Query("id"),
+        order: Literal["asc", "desc"] = Query("asc"),
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        db: AsyncSession = Depends(get_async_db),
+):
     """
     Return all products by category
     """
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.has_category(category_id):
+        return JSONResponse(content=snapshot.list_products(
+            category_id=category_id, sort_by=sort_by, descending=order == "desc", min_price=min_price, max_price=max_price,
+        ))
+
     category_stmt = select(CategoryModel).where(CategoryModel.id == category_id)
     category_crtn = await db.scalars(category_stmt)
     if category_crtn.first() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    product_stmt = select(ProductModel).where(and_(ProductModel.category_id == category_id, ProductModel.is_active == True))
+    product_stmt = _sorted_products_stmt(sort_by, order, min_price, max_price).where(ProductModel.category_id == category_id)
     product_crtn = await db.scalars(product_stmt)
     products_db = product_crtn.all()
     return products_db
 
 
+@router.get("/autocomplete", response_model=List[AutocompleteItemSchema], status_code=status.HTTP_200_OK)
+async def autocomplete(
+        prefix: str = Query(min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Suggest product and category names by prefix (typo tolerant, in-memory index)
+    """
+    return autocomplete_index.search(prefix, limit)
+
+
 @router.get("/{product_id}", response_model=ProductSchema, status_code=status.HTTP_200_OK)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_product(product_id: int):
     """
-    Return product stub
+    Return product (read-through cache, concurrent misses share one query)
     """
-    product_stmt = select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True)
-    product_crtn = await db.scalars(product_stmt)
-    product_db = product_crtn.first()
-    if product_db is None:
+    async def load():
+        product_db = await _in_own_session(_fetch_product, product_id)
+        if product_db is None:
+            return None
+        return ProductSchema.model_validate(product_db).model_dump_json().encode()
+
+    body = await product_cache.get_or_load(product_id, load)
+    if body is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return product_db
+    return Response(content=body, media_type="application/json")
 
 @router.get("/{product_id}/reviews", response_model=List[ReviewSchema], status_code=status.HTTP_200_OK)
-async def get_reviews(product_id: int, db: AsyncSession = Depends(get_async_db)):
+async def get_reviews(product_id: int):
 
+    async def load():
+        reviews = await _in_own_session(_fetch_product_reviews, product_id, timeout_ms=2000)
+        if reviews is None:
+            return None
+        return review_list_adapter.dump_json(review_list_adapter.validate_python(reviews, from_attributes=True))
+
+    body = await product_reviews_cache.get_or_load(product_id, load)
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return Response(content=body, media_type="application/json")
+
+
+async def _fetch_product_reviews(db: AsyncSession, product_id: int):
     product = await db.scalars(
         select(ProductModel)
         .options(selectinload(ProductModel.reviews))
@@ -95,11 +192,116 @@ async def get_reviews(product_id: int, db: AsyncSession = Depends(get_async_db))
     product_db = product.first()
 
     if product_db is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return None
 
     return product_db.reviews
 
 
+
+async def _in_own_session(query, *args, timeout_ms: int = DB_STATEMENT_TIMEOUT_MS):
+    """
+    Runs a query in a separate session (own pooled connection), independent of the request
+    """
+    async with async_session_maker() as session:
+        session.info["statement_timeout_ms"] = timeout_ms
+        return await query(session, *args)
+
+
+async def _fetch_product(db: AsyncSession, product_id: int):
+    product_crtn = await db.scalars(
+        select(ProductModel).where(ProductModel.id == product_id, ProductModel.is_active == True)
+    )
+    return product_crtn.first()
+
+
+async def _fetch_breadcrumb(db: AsyncSession, product_id: int):
+    product_category = select(ProductModel.category_id).where(ProductModel.id == product_id).scalar_subquery()
+    path = (
+        select(CategoryModel.id, CategoryModel.parent_id, literal(0).label("depth"))
+        .where(CategoryModel.id == product_category)
+        .cte("category_path", recursive=True)
+    )
+    parent = aliased(CategoryModel)
+    path = path.union_all(
+        select(parent.id, parent.parent_id, path.c.depth + 1).where(parent.id == path.c.parent_id)
+    )
+    category_crtn = await db.scalars(
+        select(CategoryModel).join(path, CategoryModel.id == path.c.id).order_by(path.c.depth.desc())
+    )
+    return category_crtn.all()
+
+
+async def _fetch_rating_summary(db: AsyncSession, product_id: int):
+    result = await db.execute(
+        select(ReviewModel.grade, func.count())
+        .where(ReviewModel.product_id == product_id, ReviewModel.is_active == True)
+        .group_by(ReviewModel.grade)
+    )
+    histogram = {grade: count for grade, count in result.all()}
+    count = sum(histogram.values())
+    average = round(sum(grade * n for grade, n in histogram.items()) / count, 2) if count else None
+    return {"count": count, "average": average, "histogram": histogram}
+
+
+async def _fetch_recent_reviews(db: AsyncSession, product_id: int):
+    review_crtn = await db.scalars(
+        select(ReviewModel)
+        .where(ReviewModel.product_id == product_id, ReviewModel.is_active == True)
+        .order_by(ReviewModel.comment_date.desc(), ReviewModel.id.desc())
+        .limit(PRODUCT_DETAIL_REVIEWS)
+    )
+    return review_crtn.all()
+
+
+@router.get("/{product_id}/detail", response_model=ProductDetailSchema, status_code=status.HTTP_200_OK)
+async def get_product_detail(product_id: int):
+    """
+    Return product, category breadcrumb, rating summary and recent reviews in one response
+    """
+    detail = product_detail_cache.get(product_id)
+    if detail is not None:
+        return detail
+
+    product_db, breadcrumb, rating_summary, recent_reviews = await asyncio.gather(
+        _in_own_session(_fetch_product, product_id),
+        _in_own_session(_fetch_breadcrumb, product_id),
+        _in_own_session(_fetch_rating_summary, product_id),
+        _in_own_session(_fetch_recent_reviews, product_id),
+    )
+    if product_db is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    detail = ProductDetailSchema.model_validate(
+        {
+            "product": product_db,
+            "breadcrumb": breadcrumb,
+            "rating_summary": rating_summary,
+            "recent_reviews": recent_reviews,
+        },
+        from_attributes=True,
+    )
+    product_detail_cache.set(product_id, detail)
+    return detail
+
+
+@router.get("/{product_id}/related", response_model=List[ProductSchema], status_code=status.HTTP_200_OK)
+async def get_related_products(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Return products often reviewed together with this one (precomputed by app.related_products)
+    """
+    product_crtn = await db.scalars(
+        select(ProductModel)
+        .join(RelatedProductModel, RelatedProductModel.related_product_id == ProductModel.id)
+        .where(
+            RelatedProductModel.product_id == product_id,
+            RelatedProductModel.related_product_id != product_id,
+            ProductModel.is_active == True,
+        )
+        .order_by(RelatedProductModel.rank)
+    )
+    return product_crtn.all()
+
+
 @router.put("/{product_id}", response_model=ProductSchema, status_code=status.HTTP_200_OK)
 async def update_product(
         product_id: int,
@@ -123,6 +325,7 @@ async def update_product(
     if category_crtn.first() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
+    old_category_id = product_db.category_id
     await db.execute(
         update(ProductModel)
         .where(ProductModel.id == product_id)
@@ -130,6 +333,11 @@ async def update_product(
     )
     await db.commit()
     await db.refresh(product_db)
+    hub.publish_product(product_db, category_id=old_category_id)
+    product_detail_cache.invalidate(product_id)
+    product_cache.invalidate(product_id)
+    await record_product(db, product_id, product_db.category_id, is_active=True)
+    autocomplete_index.add("product", product_id, product_db.name)
 
     return product_db
 
@@ -157,5 +365,12 @@ async def delete_product(product_id: int,
         .values(is_active=False)
     )
     await db.commit()
+    await db.refresh(product_db)
+    hub.publish_product(product_db)
+    product_detail_cache.invalidate(product_id)
+    product_cache.invalidate(product_id)
+    product_reviews_cache.invalidate(product_id)
+    await record_product(db, product_id, product_db.category_id, is_active=False)
+    autocomplete_index.remove("product", product_id)
 
     return {"message": "Review deleted"}
\ No newline at end of file
@@ -15,6 +15,8 @@ from app.db_depends import get_db, get_async_db
 from app.schemas import Review as ReviewSchema, ReviewCreate as ReviewCreateSchema
 from app.auth import get_current_user
 from app.routers.utils import update_product_rating
+from app.leaderboards import record_review
+from app.timeouts import statement_timeout
 
 router = APIRouter(
     prefix="/reviews",
@@ -22,6 +24,7 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[ReviewSchema], status_code=status.HTTP_200_OK)
+@statement_timeout(3000)
 async def get_reviews(db: AsyncSession = Depends(get_async_db)):
     """
     Return all reviews
@@ -63,6 +66,7 @@ async def create_review(
     await db.refresh(review_db)
 
     await update_product_rating(product_db.id, db)
+    await record_review(db, product_db.id, product_db.category_id, review_db.grade, review_db.comment_date, added=True)
 
     return review_db
 
@@ -96,5 +100,7 @@ async def delete_review(
     await db.commit()
 
     await update_product_rating(review_db.product_id, db)
+    product_db = await db.get(ProductModel, review_db.product_id)
+    await record_review(db, product_db.id, product_db.category_id, review_db.grade, review_db.comment_date, added=False)
 
     return review_db
\ No newline at end of file
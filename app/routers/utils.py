@@ -1,8 +1,11 @@
-from sqlalchemy.sql import func, select
+from sqlalchemy.sql import func, select, update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.reviews import Review as ReviewModel
 from app.models.products import Product as ProductModel
+from app.models.categories import Category as CategoryModel
+from app.live import hub
+from app.cache import product_cache, product_reviews_cache, product_detail_cache
 
 async def update_product_rating(product_id: int, db: AsyncSession):
     result = await db.execute(
@@ -15,4 +18,83 @@ async def update_product_rating(product_id: int, db: AsyncSession):
     avg_rating = result.scalar() or 0.0
     product = await db.get(ProductModel, product_id)
     product.rating = avg_rating
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    product_cache.invalidate(product_id)
+    product_reviews_cache.invalidate(product_id)
+    product_detail_cache.invalidate(product_id)
+    hub.publish_product(product)
+
+def category_subtree(category_id: int):
+    """
+    Рекурсивный CTE с id категории и всех ее потомков (независимо от is_active)
+    """
+    subtree = (
+        select(CategoryModel.id)
+        .where(CategoryModel.id == category_id)
+        .cte("category_subtree", recursive=True)
+    )
+    return subtree.union_all(
+        select(CategoryModel.id).where(CategoryModel.parent_id == subtree.c.id)
+    )
+
+
+def cascade_product_ids(category_id: int):
+    """
+    SELECT id товаров поддерева, выключенных каскадом с этим корнем
+    """
+    return select(ProductModel.id).where(
+        ProductModel.category_id.in_(select(category_subtree(category_id).c.id)),
+        ProductModel.deactivated_by_id == category_id,
+    )
+
+
+async def deactivate_category_subtree(category_id: int, db: AsyncSession):
+    """
+    Выключает активные категории поддерева и их активные товары двумя set-based UPDATE.
+    Строки помечаются корнем каскада, чтобы reactivate вернул только их.
+    Возвращает (id категорий, [(id, name) товаров]); коммит за вызывающим.
+    """
+    subtree = category_subtree(category_id)
+    categories = await db.execute(
+        update(CategoryModel)
+        .where(CategoryModel.id.in_(select(subtree.c.id)), CategoryModel.is_active == True)
+        .values(is_active=False, deactivated_by_id=category_id)
+        .returning(CategoryModel.id)
+        .execution_options(synchronize_session=False)
+    )
+    category_ids = categories.scalars().all()
+    products = await db.execute(
+        update(ProductModel)
+        .where(ProductModel.category_id.in_(select(subtree.c.id)), ProductModel.is_active == True)
+        .values(is_active=False, deactivated_by_id=category_id)
+        .returning(ProductModel.id, ProductModel.name)
+        .execution_options(synchronize_session=False)
+    )
+    return category_ids, products.all()
+
+
+async def reactivate_category_subtree(category_id: int, db: AsyncSession):
+    """
+    Включает корень и строки поддерева, выключенные каскадом именно этого корня.
+    Товары, удаленные продавцом, и вложенные каскады с другим корнем не затрагиваются.
+    """
+    subtree = category_subtree(category_id)
+    categories = await db.execute(
+        update(CategoryModel)
+        .where(
+            CategoryModel.id.in_(select(subtree.c.id)),
+            or_(CategoryModel.id == category_id, CategoryModel.deactivated_by_id == category_id),
+        )
+        .values(is_active=True, deactivated_by_id=None)
+        .returning(CategoryModel.id, CategoryModel.name)
+        .execution_options(synchronize_session=False)
+    )
+    category_rows = categories.all()
+    products = await db.execute(
+        update(ProductModel)
+        .where(ProductModel.category_id.in_(select(subtree.c.id)), ProductModel.deactivated_by_id == category_id)
+        .values(is_active=True, deactivated_by_id=None)
+        .returning(ProductModel.id, ProductModel.name)
+        .execution_options(synchronize_session=False)
+    )
+    return category_rows, products.all()
@@ -76,4 +76,60 @@ class Review(BaseModel):
     comment: str
     comment_date: datetime
     grade: int
-    is_active: bool
\ No newline at end of file
+    is_active: bool
+
+class Change(BaseModel):
+    """
+    Change feed entry: upsert of an active row or tombstone of a deactivated one
+    """
+    entity: str = Field(description="product, category or review")
+    id: int = Field(description="Entity ID")
+    version: int = Field(description="Change version (cursor)")
+    op: str = Field(description="upsert or delete")
+    data: Optional[dict] = Field(None, description="Entity data for upsert")
+
+
+class ChangeFeed(BaseModel):
+    """
+    Change feed page
+    """
+    changes: list[Change] = Field(description="Changes in commit order")
+    next_cursor: str = Field(description="Opaque cursor for the next request")
+
+
+class RatingSummary(BaseModel):
+    """
+    Product rating summary
+    """
+    count: int = Field(description="Number of active reviews")
+    average: Optional[float] = Field(None, description="Average grade")
+    histogram: dict[int, int] = Field(description="Number of reviews per grade")
+
+
+class ProductDetail(BaseModel):
+    """
+    Product page model: product, category breadcrumb, rating summary and recent reviews
+    """
+    product: Product = Field(description="Product")
+    breadcrumb: list[Category] = Field(description="Categories from root to the product category")
+    rating_summary: RatingSummary = Field(description="Rating summary")
+    recent_reviews: list[Review] = Field(description="Most recent reviews")
+
+
+class LeaderboardEntry(BaseModel):
+    """
+    Category leaderboard entry
+    """
+    product_id: int = Field(description="Product ID")
+    score: float = Field(description="Bayesian average grade (top) or decayed review count (trending)")
+    review_count: int = Field(description="Number of active reviews")
+
+
+class AutocompleteItem(BaseModel):
+    """
+    Autocomplete suggestion
+    """
+    kind: str = Field(description="product or category")
+    id: int = Field(description="Product or category ID")
+    name: str = Field(description="Name")
+    distance: int = Field(description="Number of typos relative to the prefix")
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.config import SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_EXPLAIN_SAMPLE_RATE, SLOW_QUERY_MAX_FINGERPRINTS
+from app.database import async_engine
+
+logger = logging.getLogger("app.slow_queries")
+
+# Маршрут текущего запроса, выставляется RouteContextMiddleware
+_current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+# Агрегаты медленных запросов по нормализованному отпечатку
+_slow_queries: dict[str, dict] = {}
+_pending_plans: set[str] = set()
+# Ссылки на задачи EXPLAIN: без них сборщик мусора может уничтожить задачу посреди выполнения
+_plan_tasks: set[asyncio.Task] = set()
+
+# asyncpg-диалект пишет параметры как $1::INTEGER, $2::TIMESTAMP WITHOUT TIME ZONE, $3::VARCHAR[]
+_BIND_CAST = re.compile(
+    r"(\$\d+)::\w+(?:\s*\(\s*\d+(?:\s*,\s*\d+)?\s*\))?(?:\s+with(?:out)?\s+time\s+zone)?(?:\[\])*",
+    re.IGNORECASE,
+)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Нормализует SQL: литералы и параметры заменяются на ?, списки IN сворачиваются
+    """
+    normalized = _BIND_CAST.sub(r"\1", statement)
+    normalized = _STRING_LITERAL.sub("?", normalized)
+    normalized = _BIND_PARAM.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def redact_parameters(parameters) -> list:
+    """
+    Оставляет числа, даты и bool; строки (email, хэши паролей, комментарии) скрываются
+    """
+    if parameters is None:
+        return []
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    redacted = []
+    for value in parameters:
+        if value is None or isinstance(value, (bool, int, float)):
+            redacted.append(value)
+        elif isinstance(value, (date, datetime)):
+            redacted.append(value.isoformat())
+        elif isinstance(value, str):
+            redacted.append(f"<redacted str len={len(value)}>")
+        else:
+            redacted.append(f"<redacted {type(value).__name__}>")
+    return redacted
+
+
+def get_slow_queries() -> list[dict]:
+    """
+    Агрегаты медленных запросов, самые затратные по суммарному времени первыми
+    """
+    return sorted(_slow_queries.values(), key=lambda item: item["total_ms"], reverse=True)
+
+
+def reset_slow_queries() -> None:
+    _slow_queries.clear()
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Время старта хранится в контексте выполнения: если запрос упал, after_cursor_execute
+    # не вызывается, и стек на соединении из пула разъехался бы с последующими запросами
+    context._slow_query_started = time.perf_counter()
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < SLOW_QUERY_THRESHOLD_MS or conn.info.get("explain_connection"):
+        return
+
+    key = fingerprint(statement)
+    route = _current_route.get()
+    params = redact_parameters(parameters)
+    logger.warning("Slow query %.1f ms on %s: %s params=%s", duration_ms, route, statement, params)
+
+    entry = _slow_queries.get(key)
+    if entry is None:
+        if len(_slow_queries) >= SLOW_QUERY_MAX_FINGERPRINTS:
+            # Вытесняем отпечаток с наименьшим суммарным временем
+            del _slow_queries[min(_slow_queries, key=lambda item: _slow_queries[item]["total_ms"])]
+        entry = _slow_queries[key] = {
+            "fingerprint": key,
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "routes": [],
+            "example": None,
+            "plan": None,
+        }
+    entry["count"] += 1
+    entry["total_ms"] = round(entry["total_ms"] + duration_ms, 3)
+    if duration_ms >= entry["max_ms"]:
+        entry["max_ms"] = round(duration_ms, 3)
+        entry["example"] = {"statement": statement, "parameters": params, "route": route}
+    if route is not None and route not in entry["routes"]:
+        entry["routes"].append(route)
+
+    if (
+        entry["plan"] is None
+        and key not in _pending_plans
+        and statement.lstrip().upper().startswith("SELECT")
+        and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    ):
+        _pending_plans.add(key)
+        task = asyncio.get_running_loop().create_task(_capture_plan(key, statement, parameters))
+        _plan_tasks.add(task)
+        task.add_done_callback(_plan_tasks.discard)
+
+
+async def _capture_plan(key: str, statement: str, parameters) -> None:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) на отдельном соединении; транзакция всегда откатывается
+    """
+    try:
+        async with async_engine.connect() as connection:
+            connection.sync_connection.info["explain_connection"] = True
+            try:
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                plan = "\n".join(row[0] for row in result)
+            finally:
+                connection.sync_connection.info.pop("explain_connection", None)
+                await connection.rollback()
+        if key in _slow_queries:
+            _slow_queries[key]["plan"] = plan
+    except Exception:
+        logger.exception("Failed to capture plan for slow query %s", key)
+    finally:
+        _pending_plans.discard(key)
+
+
+class RouteContextMiddleware:
+    """
+    Запоминает метод и путь запроса, чтобы привязать медленные запросы к маршруту
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _current_route.set(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_route.reset(token)
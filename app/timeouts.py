@@ -0,0 +1,101 @@
+import asyncio
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+
+from app.config import DB_STATEMENT_TIMEOUT_MS
+
+QUERY_CANCELED = "57014"
+
+
+def statement_timeout(timeout_ms: int):
+    """
+    Задает бюджет statement_timeout для маршрута (декоратор под @router.get)
+    """
+    def decorator(endpoint):
+        endpoint.statement_timeout_ms = timeout_ms
+        return endpoint
+    return decorator
+
+
+def route_statement_timeout(request: Request) -> int:
+    endpoint = request.scope.get("endpoint")
+    return getattr(endpoint, "statement_timeout_ms", DB_STATEMENT_TIMEOUT_MS)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection):
+    """
+    Каждая транзакция сессии получает SET LOCAL statement_timeout из session.info
+    """
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+async def database_error_handler(request: Request, exc: Exception):
+    """
+    Statement timeout -> 504, exhausted connection pool -> 503
+    """
+    if isinstance(exc, PoolTimeoutError):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Database is busy, try again later"},
+            headers={"Retry-After": "1"},
+        )
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "sqlstate", None) == QUERY_CANCELED or getattr(orig, "pgcode", None) == QUERY_CANCELED:
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "Database query timed out"},
+        )
+    raise exc
+
+
+class CancelOnDisconnectMiddleware:
+    """
+    Cancels GET/HEAD handlers when the client disconnects before the response is
+    complete, so a running query is cancelled and its connection goes back to the
+    pool right away
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+
+        messages: asyncio.Queue = asyncio.Queue()
+        response_complete = False
+
+        async def send_tracking(message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                await messages.put(message)
+                # После полного ответа отключение штатное: BackgroundTasks ответа должны доработать
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not watcher.done() or response_complete:
+                raise
+        finally:
+            handler.cancel()
+            watcher.cancel()